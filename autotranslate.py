@@ -1,14 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
 import logging
+import re
 from os.path import abspath, dirname, join
+from queue import Queue
+import sqlite3
+from threading import Event, Thread
+import time
+from typing import Any, Dict, Final, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pywikibot
 import argparse
 from pywikitools.family import Family
 from pywikitools.fortraininglib import ForTrainingLib
-from googletrans import Translator
+from pywikitools.lang.translated_page import TranslationSnippet, TranslationUnit
 from configparser import ConfigParser
+try:
+    from orjson import loads as json_loads
+except ImportError:     # orjson is optional, it's just faster in parsing the (potentially long) DeepL responses
+    from json import loads as json_loads
 
-TIMEOUT: int = 30           # Timeout after 30s (prevent indefinite hanging when there is network issues)
+TIMEOUT: int = 30            # Timeout after 30s (prevent indefinite hanging when there is network issues)
+DEEPL_BATCH_SIZE: int = 50   # DeepL accepts up to 50 texts in one request
+UPLOAD_QUEUE_SIZE: int = 16  # How many translated units may wait for being uploaded
+
+# Upload errors after which it makes sense to continue with the next translation unit
+TRANSIENT_UPLOAD_ERRORS: Final[Tuple] = (pywikibot.exceptions.ServerError, requests.exceptions.ConnectionError,
+                                         requests.exceptions.Timeout)
+
+# Snippets matching this (only numbers / punctuation / whitespace or a URL) don't need to be translated
+NO_TRANSLATION_PATTERN: Final[re.Pattern] = re.compile(r"[\d\W_]*|\s*https?://\S+\s*")
+
+
+class TranslationCache:
+    """
+    Persistent cache of machine translations, stored in a SQLite database.
+
+    Many short snippets (e.g. "Yes", headings, questions) appear in lots of worksheets,
+    so we don't need to ask DeepL / Google again for every one of them.
+    """
+    def __init__(self, path: str, max_age_days: Optional[int] = None):
+        """
+        @param path: File name of the SQLite database (will be created if it doesn't exist)
+        @param max_age_days: Remove all cached translations that are older than this
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS translations "
+                                 "(key TEXT PRIMARY KEY, value TEXT, service TEXT, created REAL)")
+        if max_age_days is not None:
+            self._connection.execute("DELETE FROM translations WHERE created < ?",
+                                     (time.time() - max_age_days * 86400,))
+        self._connection.commit()
+
+    @staticmethod
+    def _key(text: str, language_code: str) -> str:
+        return blake2b(f"{text}|{language_code}".encode(), digest_size=16).hexdigest()
+
+    def get(self, text: str, language_code: str) -> Optional[str]:
+        """Returns the cached translation of text into the given language or None"""
+        entry = self.get_with_service(text, language_code)
+        return entry[0] if entry is not None else None
+
+    def get_with_service(self, text: str, language_code: str) -> Optional[Tuple[str, str]]:
+        """Returns (cached translation, name of the translation service) or None"""
+        row = self._connection.execute("SELECT value, service FROM translations WHERE key = ?",
+                                       (self._key(text, language_code),)).fetchone()
+        return (row[0], row[1]) if row is not None else None
+
+    def put(self, text: str, language_code: str, translation: str, service: str):
+        self.put_many(language_code, [(text, translation, service)])
+
+    def put_many(self, language_code: str, entries: List[Tuple[str, str, str]]):
+        """
+        Store several translations in one transaction
+        @param entries: list of (text, translation, name of the translation service)
+        """
+        now = time.time()
+        self._connection.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                                     [(self._key(text, language_code), translation, service, now)
+                                      for text, translation, service in entries])
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
 
 
 class TranslationTool:
@@ -39,52 +115,212 @@ class TranslationTool:
         else:
             self.deepl_endpoint = config.get('autotranslate', 'deeplendpoint')
             self.deepl_api_key = config.get('autotranslate', 'deeplapikey')
+        # Keep the connection to DeepL open for all our requests. DeepL answers 429 in case of too many requests
+        # so we retry then (also for POST requests: translating is idempotent)
+        self.session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 502, 503],
+                      allowed_methods=None, raise_on_status=False)
+        self.session.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry))
 
-        self.google_translator = Translator()
+        # How many requests to Google Translate we have running in parallel
+        self.max_workers: int = config.getint('autotranslate', 'workers', fallback=8)
+        # Only created when we need it (importing googletrans is expensive)
+        self._google_translator: Optional[Any] = None
 
-    def fetch_and_translate(self, page_name, language_code, force=False):
-        translated_page = self.fortraininglib.get_translation_units(page_name, "en")
+        self.cache: Optional[TranslationCache] = None
+        if config.has_option('autotranslate', 'cache'):
+            self.cache = TranslationCache(config.get('autotranslate', 'cache'),
+                                          config.getint('autotranslate', 'cachedays', fallback=None))
+        # Remember for which (page, language code) we already know whether a translation exists
+        self._existing_translations: Dict[Tuple[str, str], bool] = {}
+
+    def translation_exists(self, page_name: str, language_code: str) -> bool:
+        """Is the worksheet already translated into this language? (Only asking the mediawiki system once)"""
+        if (page_name, language_code) not in self._existing_translations:
+            self._existing_translations[(page_name, language_code)] = \
+                self.fortraininglib.get_translated_title(page_name, language_code) is not None
+        return self._existing_translations[(page_name, language_code)]
 
-        if not force and self.fortraininglib.get_translated_title(page_name, language_code) is not None:
+    def fetch_and_translate(self, page_name, language_code, force=False):
+        if not force and self.translation_exists(page_name, language_code):
             self.logger.warning("Translation already exists. If you want to force overwrite, use the -f flag.")
             return
 
+        translated_page = self.fortraininglib.get_translation_units(page_name, "en")
+
         # Split the translation units into snippets to avoid mark-up symbols
+        units: List[Tuple[TranslationUnit, List[TranslationSnippet], List[str]]] = []
         for translation_unit in translated_page:
             translation_unit.split_all_tags = True  # We want that to get rid of all markup
             translation_unit.remove_links()
 
+            snippets: List[TranslationSnippet] = []
+            texts: List[str] = []
             for orig_snippet, trans_snippet in translation_unit:
-                trans_snippet.content = self.translate_with_deepl_or_google(orig_snippet.content, language_code)
+                snippets.append(trans_snippet)
+                texts.append(orig_snippet.content)
+            units.append((translation_unit, snippets, texts))
+
+        # Translate as many units at once as fit into one DeepL request. Finished units are uploaded
+        # in a separate thread while we're already translating the next ones
+        upload_queue: Queue = Queue(maxsize=UPLOAD_QUEUE_SIZE)
+        uploaded: List[str] = []
+        stop_upload = Event()
+        uploader = Thread(target=self._upload_worker, args=(upload_queue, uploaded, stop_upload))
+        uploader.start()
+        try:
+            batch: List[Tuple[TranslationUnit, List[TranslationSnippet], List[str]]] = []
+            batch_size: int = 0
+            for unit in units:
+                if stop_upload.is_set():    # No need to translate more if we can't upload it
+                    break
+                if batch and batch_size + len(unit[2]) > DEEPL_BATCH_SIZE:
+                    self._translate_units(batch, language_code, upload_queue)
+                    batch, batch_size = [], 0
+                batch.append(unit)
+                batch_size += len(unit[2])
+            if batch and not stop_upload.is_set():
+                self._translate_units(batch, language_code, upload_queue)
+        finally:
+            upload_queue.put(None)      # Signal the uploader that we're finished
+            uploader.join()
+            # We changed the translation, so we need to ask the mediawiki system next time
+            self._existing_translations.pop((page_name, language_code), None)
+        if len(uploaded) < len(units):
+            raise RuntimeError(f"Couldn't upload {len(units) - len(uploaded)} of {len(units)} translation units "
+                               f"of {page_name}/{language_code}. See the log for details.")
+
+    def _translate_units(self, units: List[Tuple[TranslationUnit, List[TranslationSnippet], List[str]]],
+                         language_code: str, upload_queue: Queue):
+        """
+        Translate all snippets of the given units and hand over the results to the uploader,
+        together with the name of the service that translated them (for the edit summary)
+        """
+        texts: List[str] = [text for _, _, unit_texts in units for text in unit_texts]
+        results: List[Tuple[str, Optional[str]]] = self._translate_batch_with_services(texts, language_code)
+        # Service for units without anything to translate (evaluated here: the uploader runs later)
+        default_service: str = "DeepL" if self.language_supported_by_deepl else "Google Translate"
+
+        position: int = 0
+        for translation_unit, snippets, _ in units:
+            services: List[str] = []
+            for trans_snippet, (translation, service) in zip(snippets, results[position:position + len(snippets)]):
+                trans_snippet.content = translation
+                if service is not None and service not in services:
+                    services.append(service)
+            position += len(snippets)
             translation_unit.sync_from_snippets()
-            self.upload_translation(f"{translation_unit.identifier}/{language_code}",
-                                    translation_unit.get_translation())
+            upload_queue.put((f"{translation_unit.identifier}/{language_code}", translation_unit.get_translation(),
+                              " and ".join(services) if services else default_service))
+
+    def _upload_worker(self, upload_queue: Queue, uploaded: List[str], stop_upload: Event):
+        """
+        Upload translations from the queue until we get None
+        @param uploaded: We add the identifiers of all successfully uploaded translation units here
+        @param stop_upload: We set this after the first error that is not transient (e.g. missing permissions)
+        """
+        while (item := upload_queue.get()) is not None:
+            identifier, translated_text, service = item
+            if stop_upload.is_set():
+                continue    # Keep emptying the queue: otherwise fetch_and_translate() could wait forever
+            try:
+                try:
+                    self.upload_translation(identifier, translated_text, service)
+                except pywikibot.exceptions.EditConflictError:
+                    self.logger.info(f"Edit conflict while uploading {identifier}. Trying again...")
+                    self.upload_translation(identifier, translated_text, service)
+                uploaded.append(identifier)
+            except TRANSIENT_UPLOAD_ERRORS as e:
+                self.logger.warning(f"Couldn't upload translation of {identifier}: {e}")
+            except Exception as e:
+                # Don't let the uploader die: otherwise fetch_and_translate() would wait forever
+                self.logger.error(f"Couldn't upload translation of {identifier}: {e}. Stopping upload.")
+                stop_upload.set()
 
     def translate_with_deepl_or_google(self, text, language_code) -> str:
         """Do the translation: First try DeepL, if that doesn't work (DeepL supports less languages), use Google"""
-        if self.language_supported_by_deepl:
-            data = {
-                "auth_key": self.deepl_api_key,
-                "text": text,
-                "target_lang": language_code
-            }
-            response = requests.post(self.deepl_endpoint, data=data, timeout=TIMEOUT)
-            if response.status_code == 200:
-                return response.json()['translations'][0]['text']
+        return self.translate_batch([text], language_code)[0]
+
+    def translate_batch(self, texts: List[str], language_code: str) -> List[str]:
+        """
+        Translate a list of texts, preserving their order.
+        Texts without anything to translate (only numbers, punctuation or a URL) are returned unchanged,
+        texts we have in our cache are not translated again.
+        """
+        return [translation for translation, _ in self._translate_batch_with_services(texts, language_code)]
+
+    def _translate_batch_with_services(self, texts: List[str],
+                                       language_code: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        Same as translate_batch()
+        @return list of (translation, name of the translation service or None if the text wasn't translated)
+        """
+        translations: Dict[str, Tuple[str, str]] = {}
+        missing: List[str] = []
+        for text in dict.fromkeys(texts):
+            if NO_TRANSLATION_PATTERN.fullmatch(text):
+                continue
+            cached: Optional[Tuple[str, str]] = \
+                self.cache.get_with_service(text, language_code) if self.cache is not None else None
+            if cached is None:
+                missing.append(text)
             else:
-                self.logger.warning(f"DeepL cannot translate to {language_code}. Using Google Translate instead.")
-                self.language_supported_by_deepl = False
+                translations[text] = cached
+
+        if missing:
+            results: List[Tuple[str, str]] = self._translate_batch(missing, language_code)
+            for text, (translation, service) in zip(missing, results):
+                translations[text] = (translation, service)
+            if self.cache is not None:
+                self.cache.put_many(language_code, [(text, translation, service)
+                                                    for text, (translation, service) in zip(missing, results)])
+        return [translations.get(text, (text, None)) for text in texts]
+
+    def _translate_batch(self, texts: List[str], language_code: str) -> List[Tuple[str, str]]:
+        """
+        Do the translation: First try DeepL (sending up to DEEPL_BATCH_SIZE texts per request),
+        if that doesn't work (DeepL supports less languages), use Google
+        @return list of (translation, name of the translation service)
+        """
+        result: List[Tuple[str, str]] = []
+        if self.language_supported_by_deepl:
+            for start in range(0, len(texts), DEEPL_BATCH_SIZE):
+                data = [("auth_key", self.deepl_api_key), ("target_lang", language_code)]
+                data.extend(("text", text) for text in texts[start:start + DEEPL_BATCH_SIZE])
+                response = self.session.post(self.deepl_endpoint, data=data, timeout=TIMEOUT)
+                if response.status_code == 200:
+                    result.extend((translation['text'], "DeepL")
+                                  for translation in json_loads(response.content)['translations'])
+                else:
+                    self.logger.warning(f"DeepL cannot translate to {language_code}. Using Google Translate instead.")
+                    self.language_supported_by_deepl = False
+                    break
+
+        # If DeepL fails, use Google Translate for the rest. It has no batch endpoint,
+        # so we at least run the requests in parallel
+        remaining_texts = texts[len(result):]
+        if len(remaining_texts) > 0 and self._google_translator is None:
+            from googletrans import Translator
+            self._google_translator = Translator()
+        if len(remaining_texts) > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                result.extend((translation, "Google Translate") for translation in executor.map(
+                    lambda text: self.translate_with_google(text, language_code), remaining_texts))
+        elif len(remaining_texts) == 1:
+            result.append((self.translate_with_google(remaining_texts[0], language_code), "Google Translate"))
+        return result
 
-        # If DeepL fails, use Google Translate
-        return self.google_translator.translate(text, dest=language_code).text
+    def translate_with_google(self, text: str, language_code: str) -> str:
+        assert self._google_translator is not None
+        return self._google_translator.translate(text, dest=language_code).text
 
-    def upload_translation(self, identifier: str, translated_text: str):
-        """Upload the automatic translation of one translation unit back into the mediawiki system"""
+    def upload_translation(self, identifier: str, translated_text: str, service: str):
+        """
+        Upload the automatic translation of one translation unit back into the mediawiki system
+        @param service: Name of the translation service(s) that did the translation (for the edit summary)
+        """
         mediawiki_page = pywikibot.Page(self.site, f"Translations:{identifier}")
         mediawiki_page.text = translated_text
-        service = "DeepL"
-        if not self.language_supported_by_deepl:
-            service = "Google Translate"
         mediawiki_page.save(summary=f"Automated translation by {service}")
 
 
@@ -7,11 +7,12 @@ python3 check_for_typos.py language_code
 """
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 import logging
 from os.path import abspath, dirname, join
 import sys
-from typing import List
+from typing import List, Optional
 
 from pywikitools.correctbot.bot import CorrectBot
 
@@ -32,6 +33,24 @@ def parse_arguments() -> argparse.Namespace:
     return parser.parse_args()
 
 
+def check_worksheet(correctbot: CorrectBot, worksheet: str, language_code: str,
+                    apply_only_rule: Optional[str]) -> str:
+    """
+    Check one worksheet for typos
+
+    Returns:
+        str: the results of this worksheet (to print them all at once)
+    """
+    report = correctbot.check_page(worksheet, language_code, apply_only_rule)
+    output: List[str] = [f"{worksheet}: {report.get_correction_counter()} corrections"]
+    if report.get_correction_counter() > 0 or report.get_suggestion_counter() > 0:
+        output.extend([report.get_correction_stats(), report.get_correction_diff(),
+                       report.get_suggestion_stats(), report.get_suggestion_diff()])
+    if report.get_warning_counter() > 0:
+        output.append(report.get_warnings())
+    return "\n".join(output)
+
+
 if __name__ == "__main__":
     args = parse_arguments()
     root = logging.getLogger()
@@ -52,13 +71,11 @@ if __name__ == "__main__":
     if args.only is not None:
         apply_only_rule = str(args.only)
 
-    for worksheet in correctbot.fortraininglib.get_worksheet_list():
-        correctbot.check_page(worksheet, args.language_code, apply_only_rule)
-        print(f"{worksheet}: {correctbot.get_correction_counter()} corrections")
-        if correctbot.get_correction_counter() > 0 or correctbot.get_suggestion_counter() > 0:
-            print(correctbot.get_correction_stats())
-            print(correctbot.get_correction_diff())
-            print(correctbot.get_suggestion_stats())
-            print(correctbot.get_suggestion_diff())
-        if correctbot.get_warning_counter() > 0:
-            print(correctbot.get_warnings())
+    # Each worksheet needs several API requests: check them in parallel but print the results in order.
+    # All threads share correctbot: this is only safe as long as CorrectBot.check_page() doesn't change
+    # any instance state (it creates its own corrector for each call)
+    worksheets: List[str] = correctbot.fortraininglib.get_worksheet_list()
+    with ThreadPoolExecutor(max_workers=config.getint('correctbot', 'workers', fallback=4)) as executor:
+        for output in executor.map(lambda worksheet: check_worksheet(correctbot, worksheet, args.language_code,
+                                                                     apply_only_rule), worksheets):
+            print(output)
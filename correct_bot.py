@@ -51,15 +51,18 @@ if __name__ == "__main__":
     args = parse_arguments()
 
     # Set up logging
+    numeric_level = getattr(logging, args.loglevel.upper(), None)
+    assert isinstance(numeric_level, int)
     root = logging.getLogger()
-    root.setLevel(logging.DEBUG)
+    # Don't let messages below our log level pass: otherwise they'd get formatted only to be discarded by the handler
+    root.setLevel(numeric_level)
     sh = logging.StreamHandler(sys.stdout)
     fformatter = logging.Formatter('%(levelname)s: %(message)s')
     sh.setFormatter(fformatter)
-    numeric_level = getattr(logging, args.loglevel.upper(), None)
-    assert isinstance(numeric_level, int)
     sh.setLevel(numeric_level)
     root.addHandler(sh)
+    # Warnings of the correctors are always needed as they're collected for the report
+    logging.getLogger("pywikitools.correctbot.correctors").setLevel(logging.WARNING)
 
     config = ConfigParser()
     config.read(join(dirname(abspath(__file__)), "config.ini"))
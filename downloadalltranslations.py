@@ -5,41 +5,79 @@ Script to download all translated PDFs of a worksheet, e.g. downloadalltranslati
 The PDF files are named [languagename in English] - [language autonym].pdf
 They're put into a (newly created) subdirectory named after the worksheet
 """
-import sys
+import argparse
 import os
 import logging
-import getopt
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 import requests
+from requests.adapters import HTTPAdapter
 from pywikitools.fortraininglib import ForTrainingLib
 
+MAX_WORKERS: int = 16        # How many files we download in parallel
+TIMEOUT: int = 30            # Timeout after 30s (prevent indefinite hanging when there is network issues)
+CHUNK_SIZE: int = 64 * 1024  # Write downloaded files to disk in chunks of 64 KiB
 
-def usage():
-    print("Usage: python3 downloadalltranslations.py [-l {debug, info, warning, error, critical}] <worksheetname>")
 
+def download(session: requests.Session, language: str, url: str, file_name: str):
+    """
+    Download one file and save it under file_name
 
-if __name__ == '__main__':
+    We store the ETag of the file in a sidecar file next to it. If the file is already there
+    and didn't change since our last download, the server answers with 304 and we don't need to download it again
+    """
+    etag_file_name = f"{file_name}.etag"
+    headers = {}
+    if os.path.isfile(file_name) and os.path.isfile(etag_file_name):
+        with open(etag_file_name, 'r') as etag_file:
+            headers['If-None-Match'] = etag_file.read().strip()
     try:
-        opts, args = getopt.getopt(sys.argv[1:], "hl:", ["help", "loglevel"])
-    except getopt.GetoptError as err:
-        # print help information and exit:
-        print(err)
-        usage()
-        sys.exit(2)
-    if len(args) != 1:
-        usage()
-        sys.exit(2)
-    worksheetname = args[0]
-    for o, a in opts:
-        if o == "-l":
-            numeric_level = getattr(logging, a.upper(), None)
-            if not isinstance(numeric_level, int):
-                raise ValueError(f"Invalid log level: {a}")
-            logging.basicConfig(level=numeric_level)
-        elif o in ("-h", "--help"):
-            usage()
-            sys.exit()
-        else:
-            logging.info("unhandled option")
+        # Stream the file to disk so that we never have the whole PDF in memory
+        with session.get(url, allow_redirects=True, stream=True, timeout=TIMEOUT, headers=headers) as file_request:
+            if file_request.status_code == 304:
+                logging.info(f"{file_name} didn't change, no need to download it again")
+                return
+            if file_request.status_code != 200:
+                # Keep the file (and the ETag) of our last successful download
+                logging.warning(f"Language: {language}, downloading {url} failed with status "
+                                f"{file_request.status_code}, ignoring")
+                return
+            # Download into a temporary file first: an interrupted download must not leave a truncated PDF
+            temp_file_name = f"{file_name}.part"
+            try:
+                with open(temp_file_name, 'wb') as file:
+                    for chunk in file_request.iter_content(chunk_size=CHUNK_SIZE):
+                        file.write(chunk)
+            except Exception:
+                if os.path.isfile(temp_file_name):
+                    os.remove(temp_file_name)
+                raise
+            os.replace(temp_file_name, file_name)
+            if 'ETag' in file_request.headers:
+                with open(etag_file_name, 'w') as etag_file:
+                    etag_file.write(file_request.headers['ETag'])
+            elif os.path.isfile(etag_file_name):
+                os.remove(etag_file_name)
+    except FileNotFoundError:
+        logging.warning(f"Language: {language}, error while trying to open file {file_name}, ignoring")
+        return
+    logging.info(f"We saved {file_name}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parse command-line arguments"""
+    log_levels: List[str] = ['debug', 'info', 'warning', 'error', 'critical']
+
+    parser = argparse.ArgumentParser(description="Download all translated PDFs of a worksheet")
+    parser.add_argument("worksheetname", help="Name of the worksheet")
+    parser.add_argument("-l", "--loglevel", choices=log_levels, default="warning", help="set loglevel for the script")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_arguments()
+    logging.basicConfig(level=getattr(logging, args.loglevel.upper()))
+    worksheetname = args.worksheetname
     logging.debug(f"Worksheetname: {worksheetname}")
     try:
         os.mkdir(worksheetname)
@@ -49,8 +87,10 @@ if __name__ == '__main__':
     fortraininglib = ForTrainingLib("https://www.4training.net")
     translations = fortraininglib.list_page_translations(worksheetname)
     logging.info(f'Worksheet {worksheetname} is translated into {len(translations)} languages: {translations.keys()}')
-    for language in translations.keys():
-        pdf = fortraininglib.get_pdf_name(worksheetname, language)
+    # First collect all information, then download all files in parallel
+    downloads: List[Tuple[str, str, str]] = []     # (language code, URL, file name)
+    pdf_names = fortraininglib.get_pdf_names(worksheetname, list(translations.keys()))
+    for language, pdf in pdf_names.items():
         if pdf is None:
             logging.warning(f"Couldn't find PDF name in {worksheetname}/{language}")
             continue
@@ -59,15 +99,15 @@ if __name__ == '__main__':
         if not url:
             logging.warning(f"Language: {language}, file: {pdf} doesn't seem to exist, ignoring")
             continue
-        file_request = requests.get(url, allow_redirects=True)
         language_autonym = fortraininglib.get_language_name(language)
         language_english = fortraininglib.get_language_name(language, 'en')
         if language_autonym is None or language_english is None:
             logging.warning(f"Strang: couldn't get language name for language {language}, ignoring")
             continue
-        file_name = f"{worksheetname}/{language_english} - {language_autonym}.pdf"
-        try:
-            open(file_name, 'wb').write(file_request.content)
-        except FileNotFoundError:
-            logging.warning(f"Language: {language}, error while trying to open file {file_name}, ignoring")
-        logging.info(f"We saved {file_name}")
+        downloads.append((language, url, f"{worksheetname}/{language_english} - {language_autonym}.pdf"))
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        # Allow one connection per worker (default is 10), otherwise connections can't be reused
+        session.mount('https://', HTTPAdapter(pool_maxsize=MAX_WORKERS))
+        # Consume the iterator so that exceptions in the worker threads are raised here
+        list(executor.map(lambda task: download(session, *task), downloads))
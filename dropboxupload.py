@@ -7,27 +7,54 @@ import sys
 import os
 import logging
 import getopt
+import io
+from functools import cache
+from threading import Lock
+from typing import BinaryIO, Optional
 import dropbox
-from dropbox.files import WriteMode
+from dropbox.files import CommitInfo, UploadSessionCursor, WriteMode
 from dropbox.exceptions import ApiError, AuthError
 import configparser
 
+CHUNK_SIZE: int = 8 * 1024 * 1024   # Bigger files are uploaded in chunks of that size with an upload session
+
 logger = logging.getLogger('pywikitools.dropboxupload')
-config = configparser.ConfigParser()
-config.read(os.path.dirname(os.path.abspath(__file__)) + '/config.ini')
+# Uploads may run in several threads: only one of them should connect to Dropbox
+_dropbox_lock = Lock()
+
+
+@cache
+def _get_config() -> configparser.ConfigParser:
+    """Read config.ini only once and only when we actually need it (not already on import)"""
+    config = configparser.ConfigParser()
+    config.read(os.path.dirname(os.path.abspath(__file__)) + '/config.ini')
+    return config
 
 
 def usage():
     print("Usage: python3 dropboxupload.py [-l loglevel] languagecode filename")
 
 
-def _upload(filename: str, content: bytes) -> bool:
+def _get_dropbox() -> Optional[dropbox.Dropbox]:
     """
-    Internal upload function: write content to the specified file
+    Connect to Dropbox only once and re-use the connection for all following uploads (thread-safe)
+    @return None if configuration is missing or the access token is invalid
     """
+    with _dropbox_lock:
+        return _connect_dropbox()
+
+
+@cache
+def _connect_dropbox() -> Optional[dropbox.Dropbox]:
+    """
+    Connect to Dropbox and check the access token. Only call this via _get_dropbox()
+    The SDK already retries requests that were rate limited (honoring Retry-After)
+    @return None if configuration is missing or the access token is invalid
+    """
+    config = _get_config()
     if (not config.has_option('Dropbox', 'folder')) or (not config.has_option('Dropbox', 'token')):
         logger.error("Dropbox configuration missing or incomplete. Not doing anything.")
-        return False
+        return None
 
     dbx = dropbox.Dropbox(config['Dropbox'].get('token'))
     # Check that the access token is valid
@@ -35,11 +62,38 @@ def _upload(filename: str, content: bytes) -> bool:
         dbx.users_get_current_account()
     except AuthError:
         logger.error("ERROR: Invalid access token; try re-generating an access token from the app console on the web.")
+        return None
+    return dbx
+
+
+def _upload_session(dbx: dropbox.Dropbox, f: BinaryIO, size: int, path: str):
+    """
+    Upload a big file in chunks: Dropbox doesn't accept more than 150MB in one request
+    and a failing request only needs to re-send one chunk
+    """
+    result = dbx.files_upload_session_start(f.read(CHUNK_SIZE))
+    cursor = UploadSessionCursor(session_id=result.session_id, offset=f.tell())
+    while size - f.tell() > CHUNK_SIZE:
+        dbx.files_upload_session_append_v2(f.read(CHUNK_SIZE), cursor)
+        cursor.offset = f.tell()
+    dbx.files_upload_session_finish(f.read(), cursor, CommitInfo(path=path, mode=WriteMode('overwrite')))
+
+
+def _upload(filename: str, f: BinaryIO, size: int) -> bool:
+    """
+    Internal upload function: write content of f (size bytes) to the specified file
+    """
+    dbx = _get_dropbox()
+    if dbx is None:
         return False
 
     logger.debug("Trying to write to Dropbox file " + filename + " ...")
+    path = _get_config()['Dropbox'].get('folder') + filename
     try:
-        dbx.files_upload(content, config['Dropbox'].get('folder') + filename, mode=WriteMode('overwrite'))
+        if size <= CHUNK_SIZE:
+            dbx.files_upload(f.read(), path, mode=WriteMode('overwrite'))
+        else:
+            _upload_session(dbx, f, size, path)
     except ApiError as err:
         # This checks for the specific error where a user doesn't have
         # enough Dropbox space quota to upload this file
@@ -66,7 +120,8 @@ def upload_string(language_code: str, filename: str, content: str) -> bool:
     Returns:
         True if successful
     """
-    return _upload(language_code + '/' + filename, content.encode())
+    encoded = content.encode()
+    return _upload(language_code + '/' + filename, io.BytesIO(encoded), len(encoded))
 
 
 def upload_file(language_code: str, filename: str) -> bool:
@@ -86,7 +141,7 @@ def upload_file(language_code: str, filename: str) -> bool:
             upload_filename = language_code + "/" + filename
 
         logger.info("Uploading " + filename + " to Dropbox as " + upload_filename + " ...")
-        return _upload(upload_filename, f.read())
+        return _upload(upload_filename, f, os.fstat(f.fileno()).st_size)
     return True
 
 
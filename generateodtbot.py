@@ -8,26 +8,57 @@ Bot that is generating translated odt files:
     - sends notification to admin with log output (both warning and debug level)
 """
 import argparse
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Dict, List, TextIO
 import pywikibot
-from os.path import abspath, dirname, join
+from os.path import abspath, dirname, join, splitext
 import sys
 import logging
 import traceback
-import io
+import tempfile
 from pywikitools.family import Family
-from pywikitools.translateodt import TranslateODT
-import dropboxupload
 import fcntl
+import signal
 import time
 from configparser import ConfigParser
 
-CONNECT_TRIES = 10
+LOCK_TIMEOUT = 60                       # Give up after waiting that many seconds for the exclusive lock
 LOCKFILENAME = 'generateodtbot.lock'    # in the "base" directory as defined in config.ini
 
+# Notification email after the generation is finished
+EMAIL_TEMPLATE = """Hello {username},
+
+The automated generation of the translated .odt and .pdf files is finished. You find them in the Dropbox:
+https://www.dropbox.com/sh/sghbc73ekwm39r2/AADPw-KftZkwjXUM6e3Xqdtpa?dl=0
+
+Please check the PDF: If everything is fine and it fits well, you can directly upload both files.
+
+Otherwise open the ODT file and adjust the formatting until everything looks nice and fits well.
+When you're done, save the file and export a PDF (with the right options).
+
+Upload files here: https://www.4training.net/Special:Upload
+Afterwards they will be available for everyone to download and use them easily.
+Here you find the detailed documentation for all the steps:
+https://www.4training.net/4training:Creating_and_Uploading_Files
+
+Take a moment to think and pray: Who would need that content and you could teach them?
+Who could you send this file so that they would benefit from it? Who could you give a printed copy?
+Ask us for support if you have any questions on how to teach this worksheet or want more training.
+
+Thank you very much for all your work!
+
+
+{warnings}{debug}"""
+
+
+def _raise_timeout(signum, frame):
+    """Signal handler for SIGALRM"""
+    raise TimeoutError()
+
 
 class GenerateODTBot:
     def __init__(self, config: ConfigParser):
+        self.config: ConfigParser = config
         # Set up logging: Also catch logs from pywikitools.translateodt, pywikitools.correctbot
         self.logger = logging.getLogger('pywikitools')
         self.logger.setLevel(logging.DEBUG)
@@ -47,51 +78,37 @@ class GenerateODTBot:
             self.logger.addHandler(fh_debug)
 
         sformatter = logging.Formatter('%(levelname)s: %(message)s')
-        self.stream = io.StringIO()
+        # Keep the logs in temporary files instead of memory: we only need them at the end
+        self.stream = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
         sh = logging.StreamHandler(self.stream)
         sh.setLevel(logging.WARNING)
         sh.setFormatter(sformatter)
         self.logger.addHandler(sh)
-        self.stream_debug = io.StringIO()
+        self.stream_debug = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
         sh_debug = logging.StreamHandler(self.stream_debug)
         sh_debug.setLevel(logging.DEBUG)
         sh_debug.setFormatter(fformatter)
         self.logger.addHandler(sh_debug)
 
+    @staticmethod
+    def _read_log(stream: TextIO) -> str:
+        """Return everything that was logged to stream so far"""
+        stream.flush()
+        stream.seek(0)
+        content = stream.read()     # This also moves the position back to the end so that logging can continue
+        return content
+
     def notify_user(self, username: str, worksheet: str, languagecode: str, admin: bool):
         user = pywikibot.User(self.site, username)
         if user.isEmailable():
             self.logger.info(f"Sending email to {username}")
-            msg = f"Hello {username},\n"
-            msg += """
-The automated generation of the translated .odt and .pdf files is finished. You find them in the Dropbox:
-https://www.dropbox.com/sh/sghbc73ekwm39r2/AADPw-KftZkwjXUM6e3Xqdtpa?dl=0
-
-Please check the PDF: If everything is fine and it fits well, you can directly upload both files.
-
-Otherwise open the ODT file and adjust the formatting until everything looks nice and fits well.
-When you're done, save the file and export a PDF (with the right options).
-
-Upload files here: https://www.4training.net/Special:Upload
-Afterwards they will be available for everyone to download and use them easily.
-Here you find the detailed documentation for all the steps:
-https://www.4training.net/4training:Creating_and_Uploading_Files
-
-Take a moment to think and pray: Who would need that content and you could teach them?
-Who could you send this file so that they would benefit from it? Who could you give a printed copy?
-Ask us for support if you have any questions on how to teach this worksheet or want more training.
-
-Thank you very much for all your work!
-
-
-"""
-            log = self.stream.getvalue()
+            log = self._read_log(self.stream)
             if log != "":
-                msg += "Please check the following log for any warnings:\n" + log
+                warnings = "Please check the following log for any warnings:\n" + log
             else:
-                msg += "Everything went smooth, no warnings or remarks :)"
-            if admin:
-                msg += "\nDEBUG:\n" + self.stream_debug.getvalue()
+                warnings = "Everything went smooth, no warnings or remarks :)"
+            debug = "\nDEBUG:\n" + self._read_log(self.stream_debug) if admin else ""
+            msg = EMAIL_TEMPLATE.format(username=username, warnings=warnings, debug=debug)
 
             ret = user.send_email(f'Generate ODT {worksheet}/{languagecode}', msg)
             if not ret:
@@ -99,58 +116,76 @@ Thank you very much for all your work!
         else:
             self.logger.error(f'User {username} is not emailable. No notification sent.')
 
+    def _check_uploads(self, futures: Dict[Future, str]):
+        """Wait for the Dropbox uploads running in parallel and log the ones that failed"""
+        for future in as_completed(futures):
+            if not future.result():
+                self.logger.error(f"Dropbox upload of {futures[future]} failed!")
+
     def run(self, worksheet: str, languagecode: str, username: str):
+        """
+        Generate the translated files, upload them and notify the user
+
+        Waiting for the exclusive lock is limited with SIGALRM: run() must therefore be called from the main thread
+        (otherwise signal.signal() raises ValueError) and cancels any alarm() the caller has set before.
+        @raise TimeoutError if we couldn't get the exclusive lock for LibreOffice in time
+        """
         self.logger.debug(f"worksheet: {worksheet}, languagecode: {languagecode}, username: {username}")
         # We use an exclusive lock here because I'm afraid there could be race conditions if two scripts access
         # LibreOffice at the same time
         # So better safe than sorry: We use an exclusive lock here while the script is connecting with LibreOffice
-        base_path = config.get('Paths', 'base', fallback='')
+        base_path = self.config.get('Paths', 'base', fallback='')
         if base_path == '':
             self.logger.warning('No base directory specified in configuration. Using current working directory')
         f = open(f"{base_path}{LOCKFILENAME}", 'w')
-        retries = 0
-        got_lock = False
-        while not got_lock:
-            try:
-                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
-            except OSError:
-                retries += 1
-                self.logger.debug(f"Couldn't get exclusive lock. Waiting 5s and trying again. Attempt #{retries}")
-                if retries > CONNECT_TRIES:
-                    self.logger.error(f"Couldn't get exclusive lock. Tried {CONNECT_TRIES} times, giving up.")
-                    sys.exit(1)
-                time.sleep(5)
-            else:
-                got_lock = True
-        self.logger.info(f"Got exclusive lock. Retries: {retries}")
+        # Block until we get the lock: the kernel wakes us up as soon as it is released.
+        # SIGALRM interrupts the waiting in case we don't get the lock in time
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        start = time.monotonic()
+        signal.alarm(LOCK_TIMEOUT)
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except TimeoutError:
+            self.logger.error(f"Couldn't get exclusive lock. Waited {LOCK_TIMEOUT}s, giving up.")
+            f.close()
+            raise
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, previous_handler)
+        self.logger.info(f"Got exclusive lock. Waited {time.monotonic() - start:.2f}s")
 
         try:
+            # Import only here: the LibreOffice bridge is slow to load and not needed for --help or usage errors
+            from pywikitools.translateodt import TranslateODT
+            import dropboxupload
             translateodt = TranslateODT()
             filename = translateodt.translate_worksheet(worksheet, languagecode)
 
             fcntl.flock(f, fcntl.LOCK_UN)       # We can release the lock now
-            if isinstance(filename, str):
-                if not dropboxupload.upload_file(languagecode, filename):
-                    self.logger.error(f"Dropbox upload of {filename} failed!")
-                if not dropboxupload.upload_file(languagecode, filename.replace('.odt', '.pdf')):
-                    self.logger.error(f"Dropbox upload of {filename.replace('odt', '.pdf')} failed!")
-            else:
-                self.logger.error("Translateodt failed. See log above or ask an administrator for help.")
-            if not dropboxupload.upload_string(languagecode, f'log/{worksheet}.txt', self.stream.getvalue()):
-                self.logger.error(f'Dropbox upload of log/{worksheet}.txt failed')
-            if not dropboxupload.upload_string(languagecode, f'log/{worksheet}.debug.txt',
-                                               self.stream_debug.getvalue()):
-                self.logger.error(f'Dropbox upload of log/{worksheet}.debug.txt failed')
-
-            if not config.has_option('generateodtbot', 'site') or \
-               not config.has_option('generateodtbot', 'username'):
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                if isinstance(filename, str):
+                    futures = {executor.submit(dropboxupload.upload_file, languagecode, name): name
+                               for name in [filename, splitext(filename)[0] + '.pdf']}
+                    self._check_uploads(futures)
+                else:
+                    self.logger.error("Translateodt failed. See log above or ask an administrator for help.")
+                # Upload the logs only afterwards so that they include problems with the uploads above.
+                # Read both before starting the uploads as these will write to the logs again
+                logs = {f'log/{worksheet}.txt': self._read_log(self.stream),
+                        f'log/{worksheet}.debug.txt': self._read_log(self.stream_debug)}
+                futures = {executor.submit(dropboxupload.upload_string, languagecode, name, log): name
+                           for name, log in logs.items()}
+                self._check_uploads(futures)
+
+            if not self.config.has_option('generateodtbot', 'site') or \
+               not self.config.has_option('generateodtbot', 'username'):
                 self.logger.error("Missing connection settings for generateodtbot in config.ini. "
                                   "Sending no notifications")
                 return
 
-            code = config.get('generateodtbot', 'site')
+            code = self.config.get('generateodtbot', 'site')
             family = Family()
-            self.site = pywikibot.Site(code=code, fam=family, user=config.get('generateodtbot', 'username'))
+            self.site = pywikibot.Site(code=code, fam=family, user=self.config.get('generateodtbot', 'username'))
 
             # Trying to log in - otherwise notify_user() will fail and raise error
             if not self.site.logged_in():
@@ -159,8 +194,8 @@ Thank you very much for all your work!
 
             if self.site.logged_in():
                 self.notify_user(username, worksheet, languagecode, False)
-                if config.has_option('generateodtbot', 'admin'):
-                    self.notify_user(config['generateodtbot']['admin'], worksheet, languagecode, True)
+                if self.config.has_option('generateodtbot', 'admin'):
+                    self.notify_user(self.config['generateodtbot']['admin'], worksheet, languagecode, True)
                 else:
                     self.logger.warning('No admin in configuration defined. Sending no admin notification')
             else:
@@ -171,10 +206,7 @@ Thank you very much for all your work!
             self.logger.error(traceback.format_exc())
 
 
-if __name__ == '__main__':
-    config = ConfigParser()
-    config.read(join(dirname(abspath(__file__)), 'config.ini'))
-
+def main():
     log_levels: List[str] = ['debug', 'info', 'warning', 'error']
 
     desc = 'Generate translated ODT file, make it available and send notifications'
@@ -195,5 +227,14 @@ if __name__ == '__main__':
     stdout.setLevel(numeric_level)
     root.addHandler(stdout)
 
+    config = ConfigParser()
+    config.read(join(dirname(abspath(__file__)), 'config.ini'))
     bot = GenerateODTBot(config)
-    bot.run(args.worksheet, args.language_code, args.username)
+    try:
+        bot.run(args.worksheet, args.language_code, args.username)
+    except TimeoutError:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,116 @@
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
+import functools
 import logging
 import importlib
 import subprocess
 import pywikibot
-import re
-from typing import Callable, List, Optional
+import string
+from typing import Callable, Final, List, Optional
 from pywikitools.family import Family
 
 from pywikitools.fortraininglib import ForTrainingLib
 from pywikitools.correctbot.correctors.base import CorrectionResult, CorrectorBase
 from pywikitools.lang.translated_page import TranslatedPage, TranslationUnit
 
+# Translation units ending with one of these hold a file name
+FILE_EXTENSIONS = (".odt", ".pdf", ".odg", ".png")
+
+
+def is_version_number(text: str) -> bool:
+    """Does the text look like a version number (e.g. 1.2 or 1.2a)?"""
+    return len(text) in (3, 4) and text[0].isdecimal() and text[1] == "." and text[2].isdecimal() \
+        and (len(text) == 3 or text[3] in string.ascii_letters)
+
+
+class CorrectBotReport:
+    """
+    Results of checking one page: the CorrectionResult of each checked translation unit and a summary of them
+
+    Returned by CorrectBot.check_page(). This data structure is meant to be read-only after creation.
+    """
+    __slots__ = ["results", "_correction_diff", "_suggestion_diff", "_warnings", "_correction_stats",
+                 "_suggestion_stats", "_correction_counter", "_suggestion_counter", "_warning_counter"]
+
+    def __init__(self, results: List[CorrectionResult], corrector: CorrectorBase):
+        """
+        Args:
+            results: CorrectionResult for each processed translation unit
+            corrector: the corrector that produced the results (for printing statistics)
+        """
+        self.results: Final[List[CorrectionResult]] = results
+        correction_diff: List[str] = []
+        suggestion_diff: List[str] = []
+        warnings: List[str] = []
+        correction_stats: Counter = Counter()
+        suggestion_stats: Counter = Counter()
+        for result in results:
+            if result.warnings != "":
+                warnings.append(f"{result.corrections.get_name()}: {result.warnings}\n")
+            if (diff := result.corrections.get_translation_diff()) != "":
+                correction_diff.append(f"{result.corrections.get_name()}: {diff}\n")
+            if (diff := result.suggestions.get_translation_diff()) != "":
+                suggestion_diff.append(f"{result.suggestions.get_name()}: {diff}\n")
+            correction_stats.update(result.correction_stats)
+            suggestion_stats.update(result.suggestion_stats)
+
+        self._correction_diff: Final[str] = "".join(correction_diff)
+        self._suggestion_diff: Final[str] = "".join(suggestion_diff)
+        self._warnings: Final[str] = "".join(warnings)
+        # Each line is one warning (every unit's warnings got an additional line break at the end)
+        self._warning_counter: Final[int] = self._warnings.count("\n")
+        self._correction_stats: Final[str] = corrector.print_stats(correction_stats)
+        self._suggestion_stats: Final[str] = corrector.print_stats(suggestion_stats)
+        self._correction_counter: Final[int] = sum(correction_stats.values())
+        self._suggestion_counter: Final[int] = sum(suggestion_stats.values())
+
+    def get_correction_stats(self) -> str:
+        """Return a summary: which correction rules could be applied?"""
+        stats: str = f"{self._correction_counter} corrections"
+        if self._correction_counter > 0:
+            stats += ":\n" + self._correction_stats
+        return stats
+
+    def get_suggestion_stats(self) -> str:
+        """Return a summary: which corrections are suggested?"""
+        stats: str = f"{self._suggestion_counter} suggestions"
+        if self._suggestion_counter > 0:
+            stats += ":\n" + self._suggestion_stats
+        return stats
+
+    def get_warnings(self) -> str:
+        warnings: str = f"{self._warning_counter} warnings"
+        if self._warning_counter > 0:
+            warnings += ":\n" + self._warnings
+        return warnings
+
+    def get_correction_counter(self) -> int:
+        """How many corrections did we do?"""
+        return self._correction_counter
+
+    def get_suggestion_counter(self) -> int:
+        """How many suggestions did we receive?"""
+        return self._suggestion_counter
+
+    def get_warning_counter(self) -> int:
+        """How many warnings did we get?"""
+        return self._warning_counter
+
+    def get_correction_diff(self) -> str:
+        """Print a diff of the corrections"""
+        return self._correction_diff
+
+    def get_suggestion_diff(self) -> str:
+        """Print a diff of the suggestions"""
+        return self._suggestion_diff
+
 
 class CorrectBot:
-    """Main class for doing corrections"""
+    """Main class for doing corrections
+
+    After initialization only read from the instance: check_page() can be called from several threads in parallel
+    """
     def __init__(self, config: ConfigParser, simulate: bool = False):
         self._config = config
         if not self._config.has_option('correctbot', 'site') or \
@@ -31,19 +127,15 @@ class CorrectBot:
 
         self.logger: logging.Logger = logging.getLogger("pywikitools.correctbot")
         self._simulate: bool = simulate
-        self._translated_title: Optional[str] = None
-        self._correction_diff: str = ""
-        self._suggestion_diff: str = ""
-        self._warnings: str = ""
-        self._correction_stats: Optional[str] = None
-        self._suggestion_stats: Optional[str] = None
-        self._correction_counter: int = 0
-        self._suggestion_counter: int = 0
-        self._warning_counter: int = 0
-
-    def _load_corrector(self, language_code: str) -> Callable:
+        # How many corrected translation units we save in parallel
+        self._max_workers: int = self._config.getint('correctbot', 'workers', fallback=4)
+
+    @staticmethod
+    @functools.cache
+    def _load_corrector(language_code: str) -> Callable:
         """Load the corrector class for the specified language and return it.
 
+        Cached so that checking many pages of the same language looks up the class only once.
         Raises RuntimeError if corrector class can't be found"""
         # Dynamically load e.g. correctors/de.py
         module_name = f"pywikitools.correctbot.correctors.{language_code}"
@@ -62,42 +154,42 @@ class CorrectBot:
 
         raise RuntimeError(f"Couldn't load corrector for language {language_code}. Giving up")
 
-    def check_unit(self, corrector: CorrectorBase, unit: TranslationUnit,
-                   apply_only_rule: Optional[str] = None) -> Optional[CorrectionResult]:
+    def check_unit(self, corrector: CorrectorBase, unit: TranslationUnit, apply_only_rule: Optional[str] = None,
+                   translated_title: Optional[str] = None) -> Optional[CorrectionResult]:
         """
         Check one specific translation unit: Run the right correction rules on it.
         For this we analyze: Is it a title, a file name or a "normal" translation unit?
 
         Args:
             apply_only_rule: If specified, only apply the correction rule with this name
+            translated_title: The (corrected) translation of the page title. Needed to correct file names
 
         Returns:
             Result of running all correction functions on the translation unit
             None if we didn't run correctors (because the unit is not translated e.g.)
         """
-        if unit.get_translation() == "":
+        translation: str = unit.get_translation()
+        if translation == "":
             return None
 
         if unit.is_title():     # translation unit holds the title
-            result = corrector.title_correct(unit, apply_only_rule)
-            # We save this internally to correct the filename later
-            self._translated_title = result.corrections.get_translation()
-            return result
+            return corrector.title_correct(unit, apply_only_rule)
 
-        if re.search(r"\.(odt|pdf|odg|png)$", unit.get_definition()):
+        definition: str = unit.get_definition()
+        if definition.endswith(FILE_EXTENSIONS):
             # translation unit holds a filename -> correct it according to worksheet title
-            if self._translated_title is None:
+            if translated_title is None:
                 self.logger.warning("Trying to correct filename but we don't have information on translated title")
                 return None
-            if self._translated_title == "":  # Title isn't translated yet
+            if translated_title == "":  # Title isn't translated yet
                 return None
-            return corrector.filename_correct(unit, ForTrainingLib.convert_to_filename(self._translated_title))
+            return corrector.filename_correct(unit, ForTrainingLib.convert_to_filename(translated_title))
 
-        if re.search(r"^\d\.\d[a-zA-Z]?$", unit.get_definition()):
+        if is_version_number(definition):
             # translation unit holds the version number -> ignore it
             return None
-        if unit.get_translation() == unit.get_definition():
-            if len(unit.get_definition()) < 15:
+        if translation == definition:
+            if len(definition) < 15:
                 # Sometimes a translation for a single word maybe exactly the same as the English original
                 return None
             else:
@@ -106,109 +198,37 @@ class CorrectBot:
         return corrector.correct(unit, apply_only_rule)
 
     def check_page(self, page: str, language_code: str,
-                   apply_only_rule: Optional[str] = None) -> List[CorrectionResult]:
+                   apply_only_rule: Optional[str] = None) -> CorrectBotReport:
         """
-        Check one specific page and store the results in this class
+        Check one specific page
 
-        This does not write anything back to the server. Changes can be read with
-        get_correction_counter(), get_suggestion_counter() and get_warning_counter();
-        get_correction_stats(), get_suggestion_stats() and get_warnings();
-        get_correction_diff() and get_suggestion_diff()
+        This does not write anything back to the server.
 
         Args:
             apply_only_rule: If specified, only apply the correction rule with this name
 
         Returns:
-            CorrectionResult for each processed translation unit
+            CorrectBotReport with the CorrectionResult for each processed translation unit
 
         Raises:
             RuntimeError if an error occurred
         """
-        self._translated_title = None   # This is in the first translation unit and we need it to correct the file name
-        self._correction_diff = ""
-        self._suggestion_diff = ""
-        self._correction_stats = None
-        self._suggestion_stats = None
-        self._correction_counter = 0
-        self._suggestion_counter = 0
-        self._warnings = ""
-        self._warning_counter = 0
-        correction_stats: Counter = Counter()
-        suggestion_stats: Counter = Counter()
-
         translated_page: Optional[TranslatedPage] = self.fortraininglib.get_translation_units(page, language_code)
         if translated_page is None:
             raise RuntimeError("Couldn't query translation units")
         corrector = self._load_corrector(language_code)()
         results: List[CorrectionResult] = []
+        translated_title: Optional[str] = None  # This is in the first translation unit and we need it for the file name
         for translation_unit in translated_page:
-            result = self.check_unit(corrector, translation_unit, apply_only_rule)
+            result = self.check_unit(corrector, translation_unit, apply_only_rule, translated_title)
             if result is None:
                 continue
             results.append(result)
+            if translation_unit.is_title():
+                translated_title = result.corrections.get_translation()
             if result.warnings != "":
                 self.logger.warning(result.warnings)
-                self._warning_counter += result.warnings.count("\n") + 1
-                self._warnings += f"{translation_unit.get_name()}: {result.warnings}\n"
-
-            if (correction_diff := result.corrections.get_translation_diff()) != "":
-                self._correction_diff += f"{translation_unit.get_name()}: {correction_diff}\n"
-            if (suggestion_diff := result.suggestions.get_translation_diff()) != "":
-                self._suggestion_diff += f"{translation_unit.get_name()}: {suggestion_diff}\n"
-            correction_stats += Counter(result.correction_stats)
-            suggestion_stats += Counter(result.suggestion_stats)
-
-        self._correction_stats = corrector.print_stats(correction_stats)
-        self._suggestion_stats = corrector.print_stats(suggestion_stats)
-        self._correction_counter = sum(correction_stats.values())
-        self._suggestion_counter = sum(suggestion_stats.values())
-        return results
-
-    def get_correction_stats(self) -> str:
-        """Return a summary: which correction rules could be applied (in the last run)?"""
-        if self._correction_stats is None:
-            self.logger.warning("No statistics available. You need to run check_page() first.")
-            return ""
-        stats: str = f"{self._correction_counter} corrections"
-        if self._correction_counter > 0:
-            stats += ":\n" + self._correction_stats
-        return stats
-
-    def get_suggestion_stats(self) -> str:
-        """Return a summary: which corrections are suggested (in the last run)?"""
-        if self._suggestion_stats is None:
-            self.logger.warning("No statistics available. You need to run check_page() first.")
-            return ""
-        stats: str = f"{self._suggestion_counter} suggestions"
-        if self._suggestion_counter > 0:
-            stats += ":\n" + self._suggestion_stats
-        return stats
-
-    def get_warnings(self) -> str:
-        warnings: str = f"{self._warning_counter} warnings"
-        if self._warning_counter > 0:
-            warnings += ":\n" + self._warnings
-        return warnings
-
-    def get_correction_counter(self) -> int:
-        """How many corrections did we do (in the last run)?"""
-        return self._correction_counter
-
-    def get_suggestion_counter(self) -> int:
-        """How many suggestions did we receive (in the last run)?"""
-        return self._suggestion_counter
-
-    def get_warning_counter(self) -> int:
-        """How many warnings did we get (in the last run)?"""
-        return self._warning_counter
-
-    def get_correction_diff(self) -> str:
-        """Print a diff of the corrections (made in the last run)"""
-        return self._correction_diff
-
-    def get_suggestion_diff(self) -> str:
-        """Print a diff of the suggestions (made in the last run)"""
-        return self._suggestion_diff
+        return CorrectBotReport(results, corrector)
 
     def save_to_mediawiki(self, results: List[CorrectionResult]) -> bool:
         """
@@ -220,16 +240,20 @@ class CorrectBot:
         Returns:
             bool: Did we save any corrections to the mediawiki system?
         """
-        saved_corrections = False
-        for result in results:
-            if result.corrections.has_translation_changes():
-                mediawiki_page = pywikibot.Page(self.site, result.corrections.get_name())
-                mediawiki_page.text = result.corrections.get_translation()
-                mediawiki_page.save(minor=True)
-                saved_corrections = True
-        return saved_corrections
-
-    def save_report(self, page: str, language_code: str, results: List[CorrectionResult]) -> bool:
+        changed_units: List[TranslationUnit] = [result.corrections for result in results
+                                                if result.corrections.has_translation_changes()]
+        # Each save is a round-trip to the server: let them overlap
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            list(executor.map(self._save_unit, changed_units))
+        return len(changed_units) > 0
+
+    def _save_unit(self, unit: TranslationUnit):
+        """Write the translation of one corrected translation unit back to mediawiki"""
+        mediawiki_page = pywikibot.Page(self.site, unit.get_name())
+        mediawiki_page.text = unit.get_translation()
+        mediawiki_page.save(minor=True)
+
+    def save_report(self, page: str, language_code: str, report: CorrectBotReport) -> bool:
         """Save report with the correction results to the mediawiki system
 
         We save the report in our custom CorrectBot namespace, for example to CorrectBot:Prayer/de
@@ -240,60 +264,67 @@ class CorrectBot:
 
         """
         page_name: str = f"CorrectBot:{page}/{language_code}"
-        summary: str = f"{self.get_correction_counter()} corrections, {self.get_suggestion_counter()} suggestions, "
-        summary += f"{self.get_warning_counter()} warnings"
-
-        report: str = f"__NOTOC____NOEDITSECTION__\nResults for this CorrectBot run of [[{page}/{language_code}]]: "
-        report += f"<b>{summary}</b> (for older reports see [[Special:PageHistory/{page_name}|report history]])\n"
+        summary: str = f"{report.get_correction_counter()} corrections, {report.get_suggestion_counter()} suggestions, "
+        summary += f"{report.get_warning_counter()} warnings"
+
+        is_rtl: bool = self.fortraininglib.get_language_direction(language_code) == "rtl"
+        parts: List[str] = [
+            f"__NOTOC____NOEDITSECTION__\nResults for this CorrectBot run of [[{page}/{language_code}]]: "
+            f"<b>{summary}</b> (for older reports see [[Special:PageHistory/{page_name}|report history]])\n"
+        ]
         if self.fortraininglib.count_jobs() > 0:
             self.logger.warning("MediaWiki job queue is not empty!")
-            report += "  <i>Warning: MediaWiki job queue is not empty, some corrections may not be visible yet.</i>\n"
-        if self.get_warning_counter() > 0:
-            report += "\n== Warnings ==\n"
-            for result in results:
+            parts.append("  <i>Warning: MediaWiki job queue is not empty, "
+                         "some corrections may not be visible yet.</i>\n")
+        if report.get_warning_counter() > 0:
+            parts.append("\n== Warnings ==\n")
+            for result in report.results:
                 if result.warnings != "":
-                    report += f"=== [{self.fortraininglib.index_url}?title={result.corrections.get_name()}&action=edit"
-                    report += f" {result.corrections.get_name()}] ===\n"
-                    report += f"<b><pre><nowiki>{result.warnings}</nowiki></pre></b>\n"
-                    report += '{| class="wikitable'
-                    if self.fortraininglib.get_language_direction(language_code) == "rtl":
-                        report += " mw-content-rtl"
-                    report += '"\n|-\n! Original\n! Translation\n|- style="vertical-align:top"\n'
-                    report += f"|\n{result.corrections.get_definition()}\n|\n{result.corrections.get_translation()}\n"
-                    report += "|}\n"
-        if self.get_suggestion_counter() > 0:
-            report += f"\n== Suggestions ==\n{self.get_suggestion_stats()}\n<i>Look at the following suggestions. "
-            report += f"If you find good ones, please correct them manually in [{self.fortraininglib.index_url}"
-            report += f"?title=Special:Translate&group=page-{page}&action=page&filter=&language={language_code}"
-            report += " the translation view]</i>\n"
-            for result in results:
+                    parts.append(f"=== [{self.fortraininglib.index_url}?title={result.corrections.get_name()}"
+                                 f"&action=edit {result.corrections.get_name()}] ===\n"
+                                 f"<b><pre><nowiki>{result.warnings}</nowiki></pre></b>\n"
+                                 '{| class="wikitable')
+                    if is_rtl:
+                        parts.append(" mw-content-rtl")
+                    parts.append('"\n|-\n! Original\n! Translation\n|- style="vertical-align:top"\n'
+                                 f"|\n{result.corrections.get_definition()}\n"
+                                 f"|\n{result.corrections.get_translation()}\n"
+                                 "|}\n")
+        if report.get_suggestion_counter() > 0:
+            parts.append(f"\n== Suggestions ==\n{report.get_suggestion_stats()}\n"
+                         "<i>Look at the following suggestions. "
+                         f"If you find good ones, please correct them manually in [{self.fortraininglib.index_url}"
+                         f"?title=Special:Translate&group=page-{page}&action=page&filter=&language={language_code}"
+                         " the translation view]</i>\n")
+            for result in report.results:
                 if result.suggestions.has_translation_changes():
-                    report += f"=== [{self.fortraininglib.index_url}?title={result.suggestions.get_name()}&action=edit"
-                    report += f" {result.suggestions.get_name()}] ===\n"
-                    report += "{{StringDiff|" + result.suggestions.get_original_translation()
-                    report += "|" + result.suggestions.get_translation()
-                    if self.fortraininglib.get_language_direction(language_code) == "rtl":
-                        report += "|direction=rtl"
-                    report += "}}\n"
-        if self.get_correction_counter() > 0:
-            report += f"\n== Corrections ==\n{self.get_correction_stats()}\n<i>The following changes were"
-            report += " made by CorrectBot - you don't need to do anything about them, this is just for your"
-            report += " information. You can also look at the "
-            report += f"[[Special:PageHistory/{page}/{language_code}|version history of {page}/{language_code}]]"
-            report += " and compare revisions.</i>\n"
-            for result in results:
+                    parts.append(f"=== [{self.fortraininglib.index_url}?title={result.suggestions.get_name()}"
+                                 f"&action=edit {result.suggestions.get_name()}] ===\n"
+                                 "{{StringDiff|" + result.suggestions.get_original_translation()
+                                 + "|" + result.suggestions.get_translation())
+                    if is_rtl:
+                        parts.append("|direction=rtl")
+                    parts.append("}}\n")
+        if report.get_correction_counter() > 0:
+            parts.append(f"\n== Corrections ==\n{report.get_correction_stats()}\n<i>The following changes were"
+                         " made by CorrectBot - you don't need to do anything about them, this is just for your"
+                         " information. You can also look at the "
+                         f"[[Special:PageHistory/{page}/{language_code}|version history of {page}/{language_code}]]"
+                         " and compare revisions.</i>\n")
+            for result in report.results:
                 if result.corrections.has_translation_changes():
-                    report += f"=== [{self.fortraininglib.index_url}?title={result.corrections.get_name()}&action=edit"
-                    report += f" {result.corrections.get_name()}] ===\n"
-                    report += "{{StringDiff|" + result.corrections.get_original_translation()
-                    report += "|" + result.corrections.get_translation()
-                    if self.fortraininglib.get_language_direction(language_code) == "rtl":
-                        report += "|direction=rtl"
-                    report += "}}\n"
-
+                    parts.append(f"=== [{self.fortraininglib.index_url}?title={result.corrections.get_name()}"
+                                 f"&action=edit {result.corrections.get_name()}] ===\n"
+                                 "{{StringDiff|" + result.corrections.get_original_translation()
+                                 + "|" + result.corrections.get_translation())
+                    if is_rtl:
+                        parts.append("|direction=rtl")
+                    parts.append("}}\n")
+
+        content: str = "".join(parts)
         report_page = pywikibot.Page(self.site, page_name)
-        if report_page.text.strip() != report.strip():
-            report_page.text = report
+        if report_page.text.strip() != content.strip():
+            report_page.text = content
             report_page.save(summary)
             return True
         return False
@@ -333,7 +364,7 @@ class CorrectBot:
         """
         page = page.replace(' ', '_')   # spaces may lead to problems in some places: "Time with God" -> "Time_with_God"
         try:
-            results = self.check_page(page, language_code, apply_only_rule)
+            report = self.check_page(page, language_code, apply_only_rule)
         except Exception as e:
             print(f"Error while trying to correct {page}: {e}")
             return
@@ -349,24 +380,28 @@ class CorrectBot:
                     self.logger.warning(f"userinfo: {self.site.userinfo}")
                     raise RuntimeError("Login with pywikibot failed.")
 
-            saved_corrections = self.save_to_mediawiki(results)
+            saved_corrections = self.save_to_mediawiki(report.results)
             self.empty_job_queue()
-            saved_report = self.save_report(page, language_code, results)
+            saved_report = self.save_report(page, language_code, report)
 
-        # Print summary of what we did
+        # Print summary of what we did (all at once: the diffs can be long)
+        summary: List[str] = []
         if not saved_report:
-            print("NOTHING SAVED.")
+            summary.append("NOTHING SAVED.")
             if self._simulate:
-                print("We're running with --simulate. No corrections are written back to the mediawiki system.")
+                summary.append("We're running with --simulate. "
+                               "No corrections are written back to the mediawiki system.")
             elif not saved_corrections:
-                print("Nothing new. The existing CorrectBot report in the mediawiki system is still correct.")
+                summary.append("Nothing new. The existing CorrectBot report in the mediawiki system is still correct.")
             else:
-                print("WARNING: Inconsistency! Please inform an administrator. Saved corrections but not report.")
-
-        print(self.get_correction_stats())
-        if self._correction_counter > 0:
-            print(self.get_correction_diff())
-        print(self.get_suggestion_stats())
-        if self._suggestion_counter > 0:
-            print(self.get_suggestion_diff())
-        print(self.get_warnings())
+                summary.append("WARNING: Inconsistency! Please inform an administrator. "
+                               "Saved corrections but not report.")
+
+        summary.append(report.get_correction_stats())
+        if report.get_correction_counter() > 0:
+            summary.append(report.get_correction_diff())
+        summary.append(report.get_suggestion_stats())
+        if report.get_suggestion_counter() > 0:
+            summary.append(report.get_suggestion_diff())
+        summary.append(report.get_warnings())
+        print("\n".join(summary))
@@ -36,7 +36,8 @@ from inspect import signature
 import logging
 from logging.handlers import QueueHandler
 from queue import SimpleQueue
-from typing import Callable, DefaultDict, Dict, Final, Generator, List, Optional
+import threading
+from typing import Callable, DefaultDict, Dict, Final, List, Optional, Tuple
 from collections import defaultdict
 
 from pywikitools.lang.translated_page import TranslationUnit
@@ -60,6 +61,14 @@ def suggest_only(func):
     return decorator_suggest_only
 
 
+@functools.cache
+def _count_parameters(function: Callable) -> int:
+    """Return the number of parameters of a correction function (without self)
+
+    Cached as inspect.signature() is slow and we call the correction functions for every translation unit"""
+    return len(signature(function).parameters) - 1
+
+
 class CorrectionResult:
     """Returns any warnings and suggestions of running a corrector on one translation unit
 
@@ -110,8 +119,9 @@ class CorrectorBase(ABC):
         Args:
             converted_title: worksheet title converted for filename usage (see ForTrainingLib.convert_to_filename())
         """
-        is_print_pdf = len(unit.get_definition()) > 10 and unit.get_definition().endswith("_print.pdf")
-        extension = unit.get_definition()[-4:]  # Currently all possible extensions have three characters
+        definition = unit.get_definition()
+        is_print_pdf = len(definition) > 10 and definition.endswith("_print.pdf")
+        extension = definition[-4:]  # Currently all possible extensions have three characters
 
         # Tedious work: We need to build up the CorrectionResult structure
         corrections: TranslationUnit = copy.copy(unit)
@@ -123,25 +133,33 @@ class CorrectorBase(ABC):
         suggestions = copy.copy(corrections)
         return CorrectionResult(corrections, suggestions, correction_stats, {}, "")
 
+    @classmethod
+    @functools.cache
+    def _get_function_names(cls, prefix: str, suffix: str) -> Tuple[str, ...]:
+        """Return the names of all functions starting with prefix and ending with suffix
+
+        Cached: we need them for every translation unit but they only depend on the class"""
+        return tuple(s for s in dir(cls) if s.startswith(prefix) and s.endswith(suffix))
+
     def correct(self, unit: TranslationUnit, apply_only_rule: Optional[str] = None) -> CorrectionResult:
         """Call all available correction functions one after the other"""
         if apply_only_rule is not None:
-            return self._run_functions(unit, (s for s in dir(self) if s == apply_only_rule))
-        return self._run_functions(unit, (s for s in dir(self) if s.startswith("correct_")))
+            return self._run_functions(unit, tuple(s for s in dir(self) if s == apply_only_rule))
+        return self._run_functions(unit, self._get_function_names("correct_", ""))
 
     def title_correct(self, unit: TranslationUnit, apply_only_rule: Optional[str] = None) -> CorrectionResult:
         """Call all correction functions for titles one after the other
         We don't do any checks if unit actually is a title - that's the responsibility of the caller
         """
         if apply_only_rule is not None:
-            return self._run_functions(unit, (s for s in dir(self) if s == apply_only_rule))
-        return self._run_functions(unit, (s for s in dir(self) if s.endswith("_title")))
+            return self._run_functions(unit, tuple(s for s in dir(self) if s == apply_only_rule))
+        return self._run_functions(unit, self._get_function_names("", "_title"))
 
-    def _run_functions(self, unit: TranslationUnit, functions: Generator[str, None, None]) -> CorrectionResult:
+    def _run_functions(self, unit: TranslationUnit, functions: Tuple[str, ...]) -> CorrectionResult:
         """
-        Call all the functions given by the generator one after the other
+        Call all the given functions one after the other
 
-        Caution: the generator must not yield any function from this class, otherwise we run into indefinite recursion
+        Caution: functions must not contain any function from this class, otherwise we run into indefinite recursion
         """
         is_unit_well_structured, warning = unit.is_translation_well_structured()
 
@@ -150,6 +168,9 @@ class CorrectorBase(ABC):
         corrector_logger.propagate = False
         log_queue: SimpleQueue = SimpleQueue()
         log_handler = QueueHandler(log_queue)
+        # Only catch warnings of this thread (other threads may check other units at the same time)
+        thread_id = threading.get_ident()
+        log_handler.addFilter(lambda record: record.thread == thread_id)
         corrector_logger.addHandler(log_handler)
 
         # Sort: which functions correct directly and which give only suggestions?
@@ -162,21 +183,25 @@ class CorrectorBase(ABC):
             else:
                 correction_functions.append(func)
 
-        # First run all functions that directly correct
-        corrections: TranslationUnit = copy.copy(unit)
-        correction_stats: DefaultDict[str, int] = defaultdict(int)
-        for correction_function in correction_functions:
-            if self._correct_unit(correction_function, corrections,
-                                  hasattr(correction_function, "use_snippets") and is_unit_well_structured):
-                correction_stats[correction_function.__name__] += 1
-
-        # Now run all functions that make suggestions
-        suggestions = copy.copy(corrections)
-        suggestion_stats: DefaultDict[str, int] = defaultdict(int)
-        for suggestion_function in suggestion_functions:
-            if self._correct_unit(suggestion_function, suggestions,
-                                  hasattr(suggestion_function, "use_snippets") and is_unit_well_structured):
-                suggestion_stats[suggestion_function.__name__] += 1
+        try:
+            # First run all functions that directly correct
+            corrections: TranslationUnit = copy.copy(unit)
+            correction_stats: DefaultDict[str, int] = defaultdict(int)
+            for correction_function in correction_functions:
+                if self._correct_unit(correction_function, corrections,
+                                      hasattr(correction_function, "use_snippets") and is_unit_well_structured):
+                    correction_stats[correction_function.__name__] += 1
+
+            # Now run all functions that make suggestions
+            suggestions = copy.copy(corrections)
+            suggestion_stats: DefaultDict[str, int] = defaultdict(int)
+            for suggestion_function in suggestion_functions:
+                if self._correct_unit(suggestion_function, suggestions,
+                                      hasattr(suggestion_function, "use_snippets") and is_unit_well_structured):
+                    suggestion_stats[suggestion_function.__name__] += 1
+        finally:
+            # Otherwise the handlers of all units checked so far pile up and each one receives every warning
+            corrector_logger.removeHandler(log_handler)
 
         # Save warnings from the Corrector class in our CorrectionResult
         while not log_queue.empty():
@@ -220,10 +245,11 @@ class CorrectorBase(ABC):
         We check with introspection if we need to give both parameters or just one.
         @return corrected text
         """
-        if len(signature(corrector_function).parameters) == 2:
+        number_of_parameters = _count_parameters(corrector_function.__func__)
+        if number_of_parameters == 2:
             result = corrector_function(text, original)
         else:
-            assert len(signature(corrector_function).parameters) == 1
+            assert number_of_parameters == 1
             result = corrector_function(text)
         return result
 
@@ -243,11 +269,15 @@ class CorrectorBase(ABC):
             The string is at the same time valid mediawiki code for rendering a list
             An empty string if no rules were applied
         """
-        details: str = ""
-        for function_name, counter in stats.items():
-            if hasattr(self, function_name) and (docstring := getattr(self, function_name).__doc__) is not None:
-                details += "* " + docstring.partition("\n")[0]
-            else:
-                details += "* " + function_name
-            details += f" ({counter}x)\n"
-        return details
+        return "".join(f"* {self._get_description(function_name)} ({counter}x)\n"
+                       for function_name, counter in stats.items())
+
+    @classmethod
+    @functools.cache
+    def _get_description(cls, function_name: str) -> str:
+        """Return the first line of the documentation of a function (or its name if it isn't documented)
+
+        Cached: the documentation only depends on the class"""
+        if hasattr(cls, function_name) and (docstring := getattr(cls, function_name).__doc__) is not None:
+            return docstring.partition("\n")[0]
+        return function_name
@@ -1,4 +1,3 @@
-import re
 from .base import CorrectorBase, suggest_only
 from .universal import UniversalCorrector
 
@@ -16,7 +15,7 @@ class EnglishCorrector(CorrectorBase, UniversalCorrector):
     def correct_single_apostrophe(self, text: str) -> str:
         """Correct single apostrophe ' with ’"""
         # TODO what if we have ''/''' as markup for italics/bold in text?
-        return re.sub("'", '’', text)
+        return text.replace("'", '’')
 
     # TODO: Count appearances of german, english quotation marks
     # TODO: parse text from left to right and replace odd appearences with “ and even ones with ”
@@ -1,9 +1,17 @@
+from itertools import cycle
 import logging
 import re
 from typing import List
 from .base import CorrectorBase
 from .universal import UniversalCorrector
 
+MISSING_SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r"([^\W\d])([:;!?])")
+SPACE_BEFORE_PUNCTUATION_PATTERN = re.compile(r" ([:;!?])")
+SPECIAL_QUOTATION_MARK_PATTERN = re.compile('[„“”]')
+QUOTATION_MARK_PATTERN = re.compile('"')
+MISSING_SPACE_AFTER_GUILLEMET_PATTERN = re.compile(r'«([^\s])')
+MISSING_SPACE_BEFORE_GUILLEMET_PATTERN = re.compile(r'([^\s])»')
+
 
 class FrenchCorrector(CorrectorBase, UniversalCorrector):
     """
@@ -29,9 +37,9 @@ class FrenchCorrector(CorrectorBase, UniversalCorrector):
         as we don't want to destroy the mediawiki formatting symbols ; and : at the beginning of lines
         """
         # Insert missing space if there is none before punctuation
-        text = re.sub(r"([^\W\d])([:;!?])", "\\1\u00A0\\2", text)
+        text = MISSING_SPACE_BEFORE_PUNCTUATION_PATTERN.sub("\\1\u00A0\\2", text)
         # Replace normal space with non-breaking space before punctuation
-        text = re.sub(r" ([:;!?])", "\u00A0\\1", text)
+        text = SPACE_BEFORE_PUNCTUATION_PATTERN.sub("\u00A0\\1", text)
         return text
 
     def correct_quotation_marks(self, text: str) -> str:
@@ -39,24 +47,21 @@ class FrenchCorrector(CorrectorBase, UniversalCorrector):
         (with non-breaking whitespaces \u00a0 before/after the guillemets!)
         """
         logger = logging.getLogger(__name__)
-        if re.search('[„“”]', text):
+        if SPECIAL_QUOTATION_MARK_PATTERN.search(text):
             logger.warning("Found at least one special quotation mark (one of „“”). Please correct manually.")
 
-        splitted_text: List[str] = re.split('"', text)
-        if (len(splitted_text) % 2) != 1:
+        if (text.count('"') % 2) != 0:
             logger.warning('Found uneven amount of quotation marks (")! Please correct manually.')
         else:
-            # Put all parts together again, replacing all simple quotation marks with « and » (alternating)
-            text = splitted_text[0]
-            for counter in range(1, len(splitted_text)):
-                text += '«' if counter % 2 == 1 else '»'
-                text += splitted_text[counter]
+            # Replace all simple quotation marks with « and » (alternating)
+            quotation_marks = cycle('«»')
+            text = QUOTATION_MARK_PATTERN.sub(lambda _: next(quotation_marks), text)
 
         # Now we insert non-breaking spaces if necessary
-        text = re.sub('« ', '«\u00A0', text)
-        text = re.sub(r'«([^\s])', '«\u00A0\\1', text)
-        text = re.sub(' »', '\u00A0»', text)
-        text = re.sub(r'([^\s])»', '\\1\u00A0»', text)
+        text = text.replace('« ', '«\u00A0')
+        text = MISSING_SPACE_AFTER_GUILLEMET_PATTERN.sub('«\u00A0\\1', text)
+        text = text.replace(' »', '\u00A0»')
+        text = MISSING_SPACE_BEFORE_GUILLEMET_PATTERN.sub('\\1\u00A0»', text)
         return text
 
     def _suffix_for_print_version(self) -> str:
@@ -9,12 +9,31 @@ one of the functions here (otherwise only one of it gets called in the case of m
 Each function should have a documentation string which will be used for print_stats()
 """
 from abc import ABC, abstractmethod
+from itertools import cycle
 import logging
 import re
 from typing import List, Match
 
 from pywikitools.correctbot.correctors.base import suggest_only, use_snippets
 
+SENTENCE_END_PATTERN = re.compile(r'[.!?]')
+WRONG_CAPITALIZATION_PATTERN = re.compile(r'[.!?]\s*([a-z])')
+# Exception: more than one space followed by a "□" character (then the spaces are used for formatting)
+MULTIPLE_SPACES_PATTERN = re.compile(r' {2,}(?![ □])')
+# not including : and ; because that would give too many false positives from definition lists
+MISSING_SPACES_PATTERN = re.compile(r'([.!?,؛،؟])([\w])')
+# basically we check for r' +([.,])'.
+# We want to allow "I forgive ___ ." so we add [^_] in the beginning
+# But we don't want to capture ... so we add [^.] in the end
+# Now we would miss "end ." so we add the alternative with |
+SPACES_BEFORE_COMMA_AND_DOT_PATTERN = re.compile(r'([^_]) +([.,])$|([^_]) +([.,])([^.])')
+LINK_PATTERN = re.compile(r'\[\[([^\]]+)\]\]')
+# Having things like ... ? is okay so we add [^.…_] in the beginning
+SPACES_BEFORE_PUNCTUATION_PATTERN = re.compile(r'([^.…_]) +([!?;:])')
+SPACES_BEFORE_RTL_PUNCTUATION_PATTERN = re.compile(r'\s+([؛،؟])')
+QUOTATION_MARK_PATTERN = re.compile('[„“”"]')
+SEMICOLON_PATTERN = re.compile(r"([\w ])[;]")
+
 
 class UniversalCorrector(ABC):
     """Has language-independent correction functions"""
@@ -67,39 +86,27 @@ class UniversalCorrector(ABC):
             for exception in self._capitalization_exceptions():
                 # Example: text = "Use e.g. tests" and exception = "e.g."
                 # Then is_exception(5) and is_exception(7) both return True as both dots are part of an exception
-                for punctuation_match in re.finditer(re.compile(r'[.!?]'), exception):
+                for punctuation_match in SENTENCE_END_PATTERN.finditer(exception):
                     start_pos = punctuation_pos - punctuation_match.start(0)
                     end_pos = start_pos + len(exception)
                     if start_pos >= 0 and len(text) > end_pos and text[start_pos:end_pos] == exception:
                         return True
             return False
 
+        def capitalize(match: Match) -> str:
+            if is_exception(match.start(0)):
+                return match.group(0)
+            return match.group(0)[:-1] + match.group(1).upper()
+
         if len(text) <= 1:
             return text
-        find_wrong_capitalization = re.compile(r'[.!?]\s*([a-z])')
-        result: str = text
-        for match in re.finditer(find_wrong_capitalization, text):
-            if is_exception(match.start(0)):
-                continue
-            result = result[:match.end() - 1] + match.group(1).upper() + result[match.end():]
-        result = result[0].upper() + result[1:]
-        return result
+        result: str = WRONG_CAPITALIZATION_PATTERN.sub(capitalize, text)
+        return result[0].upper() + result[1:]
 
     def correct_multiple_spaces_also_in_title(self, text: str) -> str:
         """Reduce multiple spaces to one space"""
-        check_multiple_spaces = re.compile(r'( ){2,}')
-        # As we want to check for exceptions (more than one space followed by a "□" character) it gets more complicated
-        # Otherwise we could just say
-        # return re.sub(check_multiple_spaces, ' ', text)
-
-        last_start_pos = 0
-        while match := check_multiple_spaces.search(text, last_start_pos):
-            if (len(text) > match.end()) and (text[match.end()] == '□'):
-                last_start_pos = match.end()
-                continue
-            text = text[:match.start()] + " " + text[match.end():]
-            last_start_pos = match.start() + 1   # +1 because we inserted a space
-        return text
+        # The lookahead makes sure we only match complete runs of spaces and respect the exception
+        return MULTIPLE_SPACES_PATTERN.sub(' ', text)
 
     @abstractmethod
     def _missing_spaces_exceptions(self) -> List[str]:
@@ -116,17 +123,15 @@ class UniversalCorrector(ABC):
 
         Exceptions are punctuation marks between digits (as in John 3:16) and those
         defined by a language in _missing_spaces_exceptions()"""
-        # not including : and ; because that would give too many false positives from definition lists
-        check_missing_spaces = re.compile(r'([.!?,؛،؟])([\w])')
         # As we need to check for exceptions (surrounded by digits and custom list), it's a bit complicated.
         # Otherwise it'd be just
-        # return re.sub(check_missing_spaces, r'\1 \2', text)
+        # return MISSING_SPACES_PATTERN.sub(r'\1 \2', text)
         last_start_pos = 0              # necessary to not run into endless loops
 
         def does_match_exception(match: Match) -> bool:
-            nonlocal check_missing_spaces, text, last_start_pos
+            nonlocal text, last_start_pos
             for exception in self._missing_spaces_exceptions():
-                exception_match = check_missing_spaces.search(exception)
+                exception_match = MISSING_SPACES_PATTERN.search(exception)
                 if not exception_match:
                     logger = logging.getLogger(__name__)
                     logger.warning(f"Ignoring wrong exception '{exception}' for correct_missing_spaces()")
@@ -138,7 +143,7 @@ class UniversalCorrector(ABC):
                     return True
             return False
 
-        while match := check_missing_spaces.search(text, last_start_pos):
+        while match := MISSING_SPACES_PATTERN.search(text, last_start_pos):
             if match.start(1) == 0:     # it would be strange if our text directly started with a punctuation mark.
                 last_start_pos += 1     # also the following if statement would raise an IndexError
                 continue
@@ -156,16 +161,11 @@ class UniversalCorrector(ABC):
 
     def correct_spaces_before_comma_and_dot(self, text: str) -> str:
         """Erase redundant spaces before commas and dots"""
-        # basically we check for r' +([.,])'.
-        # We want to allow "I forgive ___ ." so we add [^_] in the beginning
-        # But we don't want to capture ... so we add [^.] in the end
-        # Now we would miss "end ." so we add the alternative with |
-        check_wrong_spaces = re.compile(r'([^_]) +([.,])$|([^_]) +([.,])([^.])')
-        return re.sub(check_wrong_spaces, r'\1\2\3\4\5', text)
+        return SPACES_BEFORE_COMMA_AND_DOT_PATTERN.sub(r'\1\2\3\4\5', text)
 
     def correct_wrong_dash_also_in_title(self, text: str) -> str:
         """When finding a normal dash ( - ) surrounded by spaces: Make long dash ( – ) out of it"""
-        return re.sub(' - ', ' – ', text)
+        return text.replace(' - ', ' – ')
 
     @suggest_only
     @use_snippets
@@ -183,44 +183,18 @@ class UniversalCorrector(ABC):
         text = text.replace('>i<', '<i>')
 
         # Three times doing almost the same but order is important: We need to start with the longest search string
-        # So first correcting ''''', then ''' and finally '' - is a shorter implementation possible?
+        # So first correcting ''''', then ''' and finally ''
         logger = logging.getLogger(__name__)
-
-        # Replacing ''''' (bold and italic)
-        splitted_text: List[str] = re.split("'''''", text)
-        if (len(splitted_text) % 2) != 1:   # Not an even amount of ''''': we don't do anything
-            logger.warning(f"Found uneven amount of bold italic formatting (''''') Please correct manually: {text}")
-            return text
-        else:
-            # Put all parts together again, replacing ''''' with <b><i> and </i></b> (alternating)
-            text = splitted_text[0]
-            for counter in range(1, len(splitted_text)):
-                text += '<b><i>' if counter % 2 == 1 else '</i></b>'
-                text += splitted_text[counter]
-
-        # Replacing ''' (bold)
-        splitted_text = re.split("'''", text)
-        if (len(splitted_text) % 2) != 1:   # Not an even amount of ''': we don't do anything
-            logger.warning(f"Found uneven amount of bold formatting (''') Please correct manually: {text}")
-            return text
-        else:
-            # Put all parts together again, replacing ''' with <b> and </b> (alternating)
-            text = splitted_text[0]
-            for counter in range(1, len(splitted_text)):
-                text += '<b>' if counter % 2 == 1 else '</b>'
-                text += splitted_text[counter]
-
-        # Replacing '' (italic)
-        splitted_text = re.split("''", text)
-        if (len(splitted_text) % 2) != 1:   # Not an even amount of '': we don't do anything
-            logger.warning(f"Found uneven amount of italic formatting ('') Please correct manually: {text}")
-            return text
-        else:
-            # Put all parts together again, replacing '' with <i> and </i> (alternating)
-            text = splitted_text[0]
-            for counter in range(1, len(splitted_text)):
-                text += '<i>' if counter % 2 == 1 else '</i>'
-                text += splitted_text[counter]
+        for markup, start_tag, end_tag, name in [("'''''", '<b><i>', '</i></b>', "bold italic"),
+                                                 ("'''", '<b>', '</b>', "bold"),
+                                                 ("''", '<i>', '</i>', "italic")]:
+            splitted_text: List[str] = text.split(markup)
+            if (len(splitted_text) % 2) != 1:   # Not an even amount of markup: we don't do anything
+                logger.warning(f"Found uneven amount of {name} formatting ({markup}) Please correct manually: {text}")
+                return text
+            # Put all parts together again, replacing markup with start and end tag (alternating)
+            tags = cycle([start_tag, end_tag])
+            text = splitted_text[0] + "".join(next(tags) + part for part in splitted_text[1:])
 
         # Check that there is always the same amount of formatting start and end tags
         b_start, b_end, i_start, i_end = text.count('<b>'), text.count('</b>'), text.count('<i>'), text.count('</i>')
@@ -252,12 +226,11 @@ class UniversalCorrector(ABC):
             return text
         logger = logging.getLogger(__name__)
         unchanged_text = text
-        find_link = re.compile(r'\[\[([^\]]+)\]\]')
         last_start_pos = 0  # within the translated text
         # We go through all the links in the original and for each find the corresponding link in the translation
         # and correct it. If there is more than one link, we assume the order of them is the same in the translation.
-        for match_original in re.finditer(find_link, original):
-            match_translation = find_link.search(text, last_start_pos)
+        for match_original in LINK_PATTERN.finditer(original):
+            match_translation = LINK_PATTERN.search(text, last_start_pos)
             if match_translation is None:
                 logger.warning(f"Missing [[Destination/{self._get_language_code()}|Link description]] in translation.")
                 return unchanged_text
@@ -287,9 +260,7 @@ class NoSpaceBeforePunctuationCorrector():
     """
     def correct_no_spaces_before_punctuation(self, text: str) -> str:
         """Erase redundant spaces before punctuation marks."""
-        # Having things like ... ? is okay so we add [^.…_] in the beginning
-        check_wrong_spaces = re.compile(r'([^.…_]) +([!?;:])')
-        return re.sub(check_wrong_spaces, r'\1\2', text)
+        return SPACES_BEFORE_PUNCTUATION_PATTERN.sub(r'\1\2', text)
 
 
 class QuotationMarkCorrector(ABC):
@@ -316,16 +287,13 @@ class QuotationMarkCorrector(ABC):
             start_quotation_mark: The character used at the start of a quotation
             end_quotation_mark: The character used at the end of a quotation
         """
-        splitted_text: List[str] = re.split('[„“”"]', text)
-        if (len(splitted_text) % 2) != 1:   # Not an even amount of quotes: we don't do anything
+        if (len(QUOTATION_MARK_PATTERN.findall(text)) % 2) != 0:   # Not an even amount of quotes: do nothing
             logger = logging.getLogger(__name__)
             logger.warning(f'Found uneven amount of quotation marks (")! Please correct manually: {text}')
         else:
-            # Put all parts together again, replacing all simple quotation marks
-            text = splitted_text[0]
-            for counter in range(1, len(splitted_text)):
-                text += start_quotation_mark if counter % 2 == 1 else end_quotation_mark
-                text += splitted_text[counter]
+            # Replace all simple quotation marks with start and end quotation mark (alternating)
+            quotation_marks = cycle([start_quotation_mark, end_quotation_mark])
+            text = QUOTATION_MARK_PATTERN.sub(lambda _: next(quotation_marks), text)
         return text
 
 
@@ -334,16 +302,17 @@ class RTLCorrector():
 
     def correct_wrong_spaces_in_rtl(self, text: str) -> str:
         """Erase redundant spaces before RTL punctuation marks"""
-        check_wrong_spaces = re.compile(r'\s+([؛،؟])')
-        return re.sub(check_wrong_spaces, r'\1', text)
+        return SPACES_BEFORE_RTL_PUNCTUATION_PATTERN.sub(r'\1', text)
 
     def fix_rtl_title(self, text: str) -> str:
         """When title ends with closing parenthesis, add a RTL mark at the end"""
-        return re.sub(r'\)$', ')\u200f', text)
+        if text.endswith(')'):
+            return text + '\u200f'
+        return text
 
     def correct_punctuation(self, text: str) -> str:
         """Replace normal comma, semicolon, question mark with RTL version of it"""
         text = text.replace(",", "،")
         text = text.replace("?", "؟")
         # Replace semicolon only if it's after a character or a space (not at the beginning of a line)
-        return re.sub(r"([\w ])[;]", "\\1؛", text)
+        return SEMICOLON_PATTERN.sub("\\1؛", text)
@@ -6,8 +6,10 @@ We didn't name this 4traininglib.py because starting a python file name with a n
 """
 import logging
 import re
-from typing import Any, Final, List, Optional, Dict
+from typing import Any, Final, List, Optional, Dict, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from pywikitools.lang.translated_page import TranslatedPage, TranslationUnit
 from pywikitools.resourcesbot.data_structures import TranslationProgress
@@ -15,12 +17,17 @@ from pywikitools.resourcesbot.data_structures import TranslationProgress
 # Language codes of all right-to-left languages we currently have
 RTL_LANGUAGES = ["ar", "fa", "ckb", "ar-urdun", "ps", "ur"]
 
+# Translation table for file names: spaces become underscores, some punctuation gets removed
+FILENAME_TRANSLATION = str.maketrans(" ", "_", "'’:.")
+
 
 class ForTrainingLib():
     TIMEOUT: int = 30           # Timeout after 30s (prevent indefinite hanging when there is network issues)
     CONNECT_RETRIES: int = 3    # In case a request timed out, let's try again up to three times
+    MAX_TITLES: int = 50        # Maximum number of pages the API lets us query at once
 
-    __slots__ = ["base_url", "script_path", "api_url", "index_url", "logger", "session"]
+    __slots__ = ["base_url", "script_path", "api_url", "index_url", "logger", "session",
+                 "_language_names", "_file_urls"]
 
     def __init__(self, base_url: str, script_path: str = "/mediawiki"):
         """
@@ -34,6 +41,14 @@ class ForTrainingLib():
         self.index_url: Final[str] = f"{base_url}{script_path}/index.php"
         self.logger: logging.Logger = logging.getLogger('pywikitools.lib')
         self.session: requests.Session = requests.Session()
+        # Retry when the server is overloaded or throttling us (waiting as long as Retry-After tells us).
+        # Timeouts are handled by _get() itself
+        retry = Retry(total=self.CONNECT_RETRIES, connect=0, read=0, backoff_factor=1,
+                      status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+        self.session.mount(base_url, HTTPAdapter(max_retries=retry))
+        # Caches for API results that don't change (successful results only)
+        self._language_names: Dict[Tuple[str, Optional[str]], str] = {}
+        self._file_urls: Dict[str, str] = {}
 
     def _get(self, params: Dict[str, str]) -> Any:
         """
@@ -92,8 +107,7 @@ class ForTrainingLib():
 
         This does some basic replacements to make sure we have a valid file name
         """
-        filename: str = re.sub(" ", '_', title)
-        return re.sub("['’:.]", "", filename)
+        return title.translate(FILENAME_TRANSLATION)
 
     def get_language_direction(self, language_code: str) -> str:
         """
@@ -120,6 +134,8 @@ class ForTrainingLib():
         @return Language name if successful
         @return None in case of error (also logs a warning)
         """
+        if (language_code, translate_to) in self._language_names:
+            return self._language_names[(language_code, translate_to)]
         lang_parameter: str = language_code
         if isinstance(translate_to, str):
             lang_parameter += '|' + translate_to
@@ -134,7 +150,8 @@ class ForTrainingLib():
         try:
             langname = re.search('<p>([^<]*)</p>', json['parse']['text']['*'], re.MULTILINE)
             if langname:
-                return langname.group(1).strip()
+                self._language_names[(language_code, translate_to)] = langname.group(1).strip()
+                return self._language_names[(language_code, translate_to)]
             self.logger.warning("fortraininglib.get_language_name({language_code}): Unexpected parser result")
             return None
         except KeyError:
@@ -146,8 +163,10 @@ class ForTrainingLib():
 
         @return string with the URL or None in case of an error
         """
-        # request url for downloading odt-file
+        if filename in self._file_urls:
+            return self._file_urls[filename]
 
+        # request url for downloading odt-file
         self.logger.info(f"Retrieving URL of file {filename}... ")
         json = self._get({
             "action": "query",
@@ -168,7 +187,8 @@ class ForTrainingLib():
             if int(page_number) == -1:
                 self.logger.info(f"Couldn't get URL of {filename}: file doesn't seem to exist.")
                 return None
-            return json["query"]["pages"][page_number]["imageinfo"][0]["url"]
+            self._file_urls[filename] = json["query"]["pages"][page_number]["imageinfo"][0]["url"]
+            return self._file_urls[filename]
         except KeyError:
             return None
 
@@ -196,6 +216,32 @@ class ForTrainingLib():
         except KeyError:
             return None
 
+    def get_page_sources(self, pages: List[str]) -> Dict[str, str]:
+        """
+        Return the wikitext (source) of several pages with only one API request per MAX_TITLES pages
+        @return dictionary page -> wikitext (pages that don't exist are missing)
+        """
+        result: Dict[str, str] = {}
+        for start in range(0, len(pages), self.MAX_TITLES):
+            json = self._get({
+                "action": "query",
+                "prop": "revisions",
+                "rvprop": "content",
+                "rvslots": "main",
+                "format": "json",
+                "titles": "|".join(pages[start:start + self.MAX_TITLES])
+            })
+            try:
+                # mediawiki normalizes titles (e.g. replaces _ with space): we want to return the titles we asked for
+                normalized = {entry["to"]: entry["from"] for entry in json["query"].get("normalized", [])}
+                for page in json["query"]["pages"].values():
+                    if "revisions" in page:
+                        title = normalized.get(page["title"], page["title"])
+                        result[title] = page["revisions"][0]["slots"]["main"]["*"]
+            except KeyError:
+                self.logger.warning(f"Couldn't retrieve source of pages {pages[start:start + self.MAX_TITLES]}")
+        return result
+
     def get_page_html(self, page: str) -> Optional[str]:
         """
         Return the HTML representation of a page
@@ -237,31 +283,46 @@ class ForTrainingLib():
         """ returns the name of the PDF associated with that worksheet translated into a specific language
         @return None in case we didn't find it
         """
+        return self.get_pdf_names(page, [language_code])[language_code]
+
+    def get_pdf_names(self, page: str, language_codes: List[str]) -> Dict[str, Optional[str]]:
+        """ returns the names of the PDFs associated with that worksheet translated into several languages
+        This needs much less API requests than calling get_pdf_name() for each language
+        @return dictionary language code -> PDF name (None in case we didn't find it)
+        """
+        result: Dict[str, Optional[str]] = {language_code: None for language_code in language_codes}
         # we need to retrieve the page source of the English original and scan it for the name of the PDF file
         content = self.get_page_source(page)
         if not content:
-            return None
+            return result
         # We have the page source, scan it for the PDFDownload template
         # Example: {{PdfDownload|<translate><!--T:4--> Prayer.pdf</translate>}}
         pdfdownload = re.search(r'{{PdfDownload[^}]*}', content)
         if not pdfdownload:
-            return None
+            return result
         # Identify the PDF name
         pdffile = re.search(r'[^ \n>]+\.pdf', pdfdownload.group())
         if not pdffile:
-            return None
-        if language_code == 'en':    # we're already done
-            return pdffile.group()
+            return result
+        if 'en' in result:
+            result['en'] = pdffile.group()
+        translations = [language_code for language_code in language_codes if language_code != 'en']
+        if not translations:    # we're already done
+            return result
         translation_unit: int = 0   # the number of the translation unit containing the name of the PDF file
         search_tu = re.search(r'--T:(\d+)--', pdfdownload.group())
         if search_tu:
             translation_unit = int(search_tu.group(1))
         if translation_unit == 0:
             self.logger.warning("Couldn't find number of translation unit containing the PDF file name")
-            return None
+            return result
 
-        # now we just need to look up the translation of this translation unit
-        return self.get_page_source(f"Translations:{page}/{translation_unit}/{language_code}")
+        # now we just need to look up the translations of this translation unit
+        sources = self.get_page_sources([f"Translations:{page}/{translation_unit}/{language_code}"
+                                         for language_code in translations])
+        for language_code in translations:
+            result[language_code] = sources.get(f"Translations:{page}/{translation_unit}/{language_code}")
+        return result
 
     def get_version(self, page: str, language_code: str) -> Optional[str]:
         """ Returns the version of the page in the specified language
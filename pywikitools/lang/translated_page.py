@@ -8,6 +8,13 @@ from typing import Final, List, Optional, Tuple
 
 from pywikitools.resourcesbot.data_structures import TranslationProgress, FileInfo, WorksheetInfo
 
+BR_PATTERN: Final[re.Pattern] = re.compile("<br ?/?>\n?")
+LINK_PATTERN_WITH_BAR: Final[re.Pattern] = re.compile(r"\[\[(.*?)\|(.*?)\]\]")
+# We need to remove the # of internal links, otherwise it gets the meaning of a numbering. (#?) does the trick
+LINK_PATTERN_WITHOUT_BAR: Final[re.Pattern] = re.compile(r"\[\[(#?)(.*?)\]\]")
+SNIPPET_PATTERN: Final[re.Pattern] = re.compile(r"<br ?/?>\n?|[*#]\s?|={2,6}|^:\s?|^;\s?", flags=re.MULTILINE)
+SNIPPET_PATTERN_ALL_TAGS: Final[re.Pattern] = re.compile(r"<.*?>\n?|[*#]\s?|={2,6}|^:\s?|^;\s?", flags=re.MULTILINE)
+
 
 class SnippetType(Enum):
     """
@@ -38,7 +45,7 @@ class TranslationSnippet:
         return self.type == SnippetType.MARKUP_SNIPPET
 
     def is_br(self) -> bool:
-        return (self.type == SnippetType.MARKUP_SNIPPET) and bool(re.match("<br ?/?>\n?", self.content))
+        return (self.type == SnippetType.MARKUP_SNIPPET) and bool(BR_PATTERN.match(self.content))
 
     def __str__(self):
         return f"{self.type.name} ({len(self.content)}): {self.content}"
@@ -129,20 +136,20 @@ class TranslationUnit:
         Returns a diff between original translation content and current translation content.
         If you made changes to snippets, make sure you first call sync_from_snippets()!
         """
-        diff: str = ""
+        diff: List[str] = []
         if self.has_translation_changes():
             seq_mat = difflib.SequenceMatcher(a=self._original_translation, b=self._translation)
             for operation, a_start, a_end, b_start, b_end in seq_mat.get_opcodes():
                 if operation == "delete":
-                    diff += self.RED + "{" + self._original_translation[a_start:a_end] + "}" + self.NO_COLOR
+                    diff.append(self.RED + "{" + self._original_translation[a_start:a_end] + "}" + self.NO_COLOR)
                 elif operation == "replace":
-                    diff += self.RED + "{" + self._original_translation[a_start:a_end] + ","
-                    diff += self.GREEN + self._translation[b_start:b_end] + "}" + self.NO_COLOR
+                    diff.append(self.RED + "{" + self._original_translation[a_start:a_end] + ","
+                                + self.GREEN + self._translation[b_start:b_end] + "}" + self.NO_COLOR)
                 elif operation == "insert":
-                    diff += self.GREEN + "{" + self._translation[b_start:b_end] + "}" + self.NO_COLOR
+                    diff.append(self.GREEN + "{" + self._translation[b_start:b_end] + "}" + self.NO_COLOR)
                 elif operation == "equal":
-                    diff += self._translation[b_start:b_end]
-        return diff
+                    diff.append(self._translation[b_start:b_end])
+        return "".join(diff)
 
     def get_name(self):
         return f"Translations:{self.identifier}/{self.language_code}"
@@ -154,25 +161,22 @@ class TranslationUnit:
         We have this convention so that translators are less confused as they need to write e.g. [[Prayer/de|Gebet]]
         """
         # This does all necessary replacements if the link correctly uses the form [[destination|description]]
-        link_pattern_with_bar = re.compile(r"\[\[(.*?)\|(.*?)\]\]")
-        self._definition = link_pattern_with_bar.sub(r"\2", self._definition)
-        self._translation = link_pattern_with_bar.sub(r"\2", self._translation)
+        self._definition = LINK_PATTERN_WITH_BAR.sub(r"\2", self._definition)
+        self._translation = LINK_PATTERN_WITH_BAR.sub(r"\2", self._translation)
 
         # Now we check for links that are not following the convention
-        # We need to remove the # of internal links, otherwise it gets the meaning of a numbering. (#?) does the trick
-        link_pattern_without_bar = re.compile(r"\[\[(#?)(.*?)\]\]")
-        match_d = link_pattern_without_bar.search(self._definition)
+        match_d = LINK_PATTERN_WITHOUT_BAR.search(self._definition)
         if match_d:
             self.logger.warning(f"Found errorneous link {match_d.group(0)} in English original in {self.get_name()}. "
                                 "Please tell an administrator.")
-            self._definition = link_pattern_without_bar.sub(r"\2", self._definition)
+            self._definition = LINK_PATTERN_WITHOUT_BAR.sub(r"\2", self._definition)
 
-        match_t = link_pattern_without_bar.search(self._translation)
+        match_t = LINK_PATTERN_WITHOUT_BAR.search(self._translation)
         if match_t:
             self.logger.warning(f"The following link is errorneous: {match_t.group(0)}. "
                                 f"It needs to be [[English destination/{self.language_code}|{match_t.group(2)}]]. "
                                 f"Please correct {self.get_name()}")
-            self._translation = link_pattern_without_bar.sub(r"\2", self._translation)
+            self._translation = LINK_PATTERN_WITHOUT_BAR.sub(r"\2", self._translation)
 
         if match_d or match_t:
             # Snippets need to be re-created. We don't have to do that right now, we'll do it just-in-time when needed
@@ -197,11 +201,8 @@ class TranslationUnit:
         """
         snippets: List[TranslationSnippet] = []
         last_pos = 0
-        regex = r"<br ?/?>\n?|[*#]\s?|={2,6}|^:\s?|^;\s?"
-        if split_all_tags:
-            regex = r"<.*?>\n?|[*#]\s?|={2,6}|^:\s?|^;\s?"
-        pattern = re.compile(regex, flags=re.MULTILINE)
-        for match in re.finditer(pattern, text):
+        pattern = SNIPPET_PATTERN_ALL_TAGS if split_all_tags else SNIPPET_PATTERN
+        for match in pattern.finditer(text):
             if (match.group()[0] == '#') and (match.start() >= 2) and (text[match.start() - 2:match.start()] == "[["):
                 continue        # Ignore '#' if it's part of an [[#internal link]]
             if match.start() > last_pos:
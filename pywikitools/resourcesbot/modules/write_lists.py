@@ -1,7 +1,8 @@
+import functools
 import logging
 import re
 from configparser import ConfigParser
-from typing import Final, Optional, Tuple
+from typing import Final, List, Optional, Tuple
 
 import pywikibot
 
@@ -10,6 +11,29 @@ from pywikitools.resourcesbot.changes import ChangeLog, ChangeType
 from pywikitools.resourcesbot.data_structures import FileInfo, LanguageInfo
 from pywikitools.resourcesbot.modules.post_processing import LanguagePostProcessor
 
+# Entries of the list of available training resources: lines starting with *
+LIST_ENTRY_PATTERN = re.compile(r"^\*.*$", re.MULTILINE)
+
+# Changes that always require rewriting the list
+REWRITE_CHANGES = frozenset({
+    ChangeType.UPDATED_PDF,
+    ChangeType.NEW_PDF,
+    ChangeType.DELETED_PDF,
+    ChangeType.NEW_WORKSHEET,
+    ChangeType.DELETED_WORKSHEET,
+})
+# Changes that require rewriting the list only if the worksheet has a PDF
+ODT_CHANGES = frozenset({ChangeType.NEW_ODT, ChangeType.DELETED_ODT})
+
+
+@functools.cache
+def _resources_heading_pattern(language: str) -> re.Pattern:
+    """Return the compiled pattern for the heading of the list of available training resources
+
+    Cached: we need the same pattern every time we process a language.
+    Language names can contain brackets (e.g. Turkish (secular)), so we need to escape them"""
+    return re.compile(f"Available training resources in {re.escape(language)}\\s*?</translate>\\s*?==")
+
 
 class WriteList(LanguagePostProcessor):
     """
@@ -57,18 +81,12 @@ class WriteList(LanguagePostProcessor):
         lang = language_info.language_code
         needs_rewrite = False
         for change_item in changes:
-            if change_item.change_type in [
-                ChangeType.UPDATED_PDF,
-                ChangeType.NEW_PDF,
-                ChangeType.DELETED_PDF,
-                ChangeType.NEW_WORKSHEET,
-                ChangeType.DELETED_WORKSHEET,
-            ]:
-                needs_rewrite = True
-            if (
-                change_item.change_type in [ChangeType.NEW_ODT, ChangeType.DELETED_ODT]
-            ) and language_info.worksheet_has_type(change_item.worksheet, "pdf"):
+            if change_item.change_type in REWRITE_CHANGES or (
+                change_item.change_type in ODT_CHANGES
+                and language_info.worksheet_has_type(change_item.worksheet, "pdf")
+            ):
                 needs_rewrite = True
+                break
 
         if needs_rewrite:
             self.logger.info(
@@ -117,27 +135,25 @@ class WriteList(LanguagePostProcessor):
           [[File:printpdficon_small.png|link={{filepath:Gottes_Geschichte_(fünf_Finger).pdf}}]] \
           [[File:odticon_small.png|link={{filepath:Gottes_Geschichte_(fünf_Finger).odt}}]]
         """
-        content: str = ""
+        lines: List[str] = []
         for worksheet, worksheet_info in language_info.worksheets.items():
             if worksheet_info.show_in_list(english_info.worksheets[worksheet]):
-                content += f"* [[{worksheet}/{language_info.language_code}|"
-                content += (
-                    "{{int:" + self.fortraininglib.title_to_message(worksheet) + "}}]]"
-                )
-                content += self._create_file_mediawiki(worksheet_info.get_file_type_info("pdf"))
-                content += self._create_file_mediawiki(
-                    worksheet_info.get_file_type_info("printPdf")
-                )
-                content += self._create_file_mediawiki(
-                    worksheet_info.get_file_type_info("odt")
+                message = self.fortraininglib.title_to_message(worksheet)
+                lines.append(
+                    f"* [[{worksheet}/{language_info.language_code}|"
+                    + "{{int:" + message + "}}]]"
+                    + self._create_file_mediawiki(worksheet_info.get_file_type_info("pdf"))
+                    + self._create_file_mediawiki(worksheet_info.get_file_type_info("printPdf"))
+                    + self._create_file_mediawiki(worksheet_info.get_file_type_info("odt"))
+                    + "\n"
                 )
-                content += "\n"
                 if worksheet_info.progress.translated < worksheet_info.progress.total:
                     self.logger.warning(
                         f"Worksheet {worksheet}/{language_info.language_code} "
                         f"is not fully translated!"
                     )
 
+        content: str = "".join(lines)
         self.logger.debug(content)
         return content
 
@@ -149,23 +165,13 @@ class WriteList(LanguagePostProcessor):
         @param language: The language name (as in LanguageInfo.english_name)
         @return Tuple of start and end position. (0, 0) indicates we couldn't find it
         """
-        language_re = language.replace(
-            "(", r"\("
-        )  # if language name contains brackets, we need to escape them
-        language_re = language_re.replace(
-            ")", r"\)"
-        )  # Example would be language Turkish (secular)-
-        match = re.search(
-            f"Available training resources in {language_re}\\s*?</translate>\\s*?==",
-            page_content,
-        )
+        match = _resources_heading_pattern(language).search(page_content)
         if not match:
             return 0, 0
         list_start = 0
         list_end = 0
         # Find all following list entries: must start with *
-        pattern = re.compile(r"^\*.*$", re.MULTILINE)
-        for m in pattern.finditer(page_content, match.end()):
+        for m in LIST_ENTRY_PATTERN.finditer(page_content, match.end()):
             if list_start == 0:
                 list_start = m.start()
             else:
@@ -221,26 +227,28 @@ class WriteList(LanguagePostProcessor):
                 return
             language = page.title()
 
-        list_start, list_end = self._find_resources_list(page.text, language)
+        page_content: str = page.text
+        list_start, list_end = self._find_resources_list(page_content, language)
         if (list_start == 0) or (list_end == 0):
             self.logger.warning(
                 f"Couldn't find list of available training resources in {language}! "
                 f"Doing nothing."
             )
-            self.logger.info(page.text)
+            self.logger.info(page_content)
             return
         self.logger.debug(
             f"Found existing list of available training resources "
             f"@{list_start}-{list_end}. Replacing..."
         )
-        new_page_content = page.text[0:list_start] + self.create_mediawiki(
-            language_info, english_info
-        )
-        new_page_content += page.text[list_end + 1:]
+        new_page_content = "".join((
+            page_content[:list_start],
+            self.create_mediawiki(language_info, english_info),
+            page_content[list_end + 1:],
+        ))
         self.logger.debug(new_page_content)
 
         # Save page and mark it for translation if necessary
-        if page.text.strip() == new_page_content.strip():
+        if page_content.strip() == new_page_content.strip():
             return
         page.text = new_page_content
         page.save(
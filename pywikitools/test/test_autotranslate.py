@@ -1,10 +1,13 @@
 from configparser import ConfigParser
+import json
 import unittest
 from unittest.mock import patch, Mock
 from googletrans import Translator
+import pywikibot
 import sys
 sys.path.append('../../')   # Is there a better way to do it?
-from autotranslate import TranslationTool   # noqa: E402
+from autotranslate import TranslationCache, TranslationTool   # noqa: E402
+from pywikitools.lang.translated_page import TranslatedPage, TranslationUnit  # noqa: E402
 
 
 class TestTranslationTool(unittest.TestCase):
@@ -16,21 +19,39 @@ class TestTranslationTool(unittest.TestCase):
                                             "deeplendpoint": "endpoint", "deeplapikey": "apikey"}})
         self.translator_tool = TranslationTool(config)
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
     def test_translate_with_deepl_successful(self, mock_post):
         # Mock the response from the DEEPL_ENDPOINT
         mock_response = Mock()
         mock_response.status_code = 200
-        mock_response.json.return_value = {
+        mock_response.content = json.dumps({
             'translations': [{'text': 'Bonjour'}]
-        }
+        }).encode()
         mock_post.return_value = mock_response
 
         # Test
         result = self.translator_tool.translate_with_deepl_or_google("Hello", "fr")
         self.assertEqual(result, "Bonjour")
 
-    @patch('requests.post')
+    @patch('requests.Session.post')
+    def test_translate_batch_with_deepl(self, mock_post):
+        # DeepL returns the translations in the same order as the texts we sent
+        def deepl_response(endpoint, data, timeout):
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.content = json.dumps({
+                'translations': [{'text': f"fr:{value}"} for key, value in data if key == "text"]
+            }).encode()
+            return mock_response
+        mock_post.side_effect = deepl_response
+
+        texts = [f"Text {counter}" for counter in range(60)]
+        result = self.translator_tool.translate_batch(texts, "fr")
+        self.assertEqual(result, [f"fr:{text}" for text in texts])
+        # 60 texts need two requests
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('requests.Session.post')
     @patch.object(Translator, 'translate')
     def test_translate_with_google_fallback(self, mock_translate, mock_post):
         # Mock the response from the DEEPL_ENDPOINT to return an error
@@ -46,9 +67,147 @@ class TestTranslationTool(unittest.TestCase):
             result = self.translator_tool.translate_with_deepl_or_google("Hello", "fr")
         self.assertEqual(result, "Bonjour")
 
+    @patch('requests.Session.post')
+    @patch.object(Translator, 'translate')
+    def test_translate_batch_with_google_fallback(self, mock_translate, mock_post):
+        mock_post.return_value = Mock(status_code=400)
+        mock_translate.side_effect = lambda text, dest: Mock(text=f"{dest}:{text}")
+
+        texts = [f"Text {counter}" for counter in range(20)]
+        with self.assertLogs('pywikitools.autotranslate', level='WARNING'):
+            result = self.translator_tool.translate_batch(texts, "fr")
+        # Translations done in parallel must still be returned in the original order
+        self.assertEqual(result, [f"fr:{text}" for text in texts])
+        self.assertEqual(mock_translate.call_count, 20)
+
+    @patch('requests.Session.post')
+    def test_translate_batch_without_translatable_text(self, mock_post):
+        texts = [" ", "", "42", "3.", "(1)", " - ", "https://www.4training.net/Prayer "]
+        self.assertEqual(self.translator_tool.translate_batch(texts, "fr"), texts)
+        mock_post.assert_not_called()
+
+    @patch('requests.Session.post')
+    def test_translate_batch_with_cache(self, mock_post):
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.content = json.dumps({'translations': [{'text': 'Oui'}]}).encode()
+        self.translator_tool.cache = TranslationCache(":memory:")
+        self.translator_tool.cache.put("Hello", "fr", "Bonjour", "DeepL")
+
+        self.assertEqual(self.translator_tool.translate_batch(["Hello", "Yes", "Hello"], "fr"),
+                         ["Bonjour", "Oui", "Bonjour"])
+        # Only the text missing in the cache was sent to DeepL
+        mock_post.assert_called_once()
+        self.assertEqual([value for key, value in mock_post.call_args.kwargs["data"] if key == "text"], ["Yes"])
+        self.assertEqual(self.translator_tool.cache.get_with_service("Yes", "fr"), ("Oui", "DeepL"))
+        self.assertIsNone(self.translator_tool.cache.get("Yes", "de"))
+
+    @patch('requests.Session.post')
+    def test_translate_batch_stores_in_cache_once(self, mock_post):
+        mock_post.return_value.status_code = 200
+        mock_post.return_value.content = json.dumps({'translations': [{'text': 'Oui'}, {'text': 'Non'}]}).encode()
+        self.translator_tool.cache = TranslationCache(":memory:")
+        with patch.object(TranslationCache, 'put_many', wraps=self.translator_tool.cache.put_many) as mock_put_many:
+            self.translator_tool.translate_batch(["Yes", "No"], "fr")
+        # All translations of a batch are stored in one transaction
+        mock_put_many.assert_called_once()
+        self.assertEqual(self.translator_tool.cache.get_with_service("No", "fr"), ("Non", "DeepL"))
+
+    @patch('pywikibot.Page')
+    @patch('requests.Session.post')
+    def test_fetch_and_translate(self, mock_post, mock_page):
+        def deepl_response(endpoint, data, timeout):
+            mock_response = Mock()
+            mock_response.status_code = 200
+            mock_response.content = json.dumps({
+                'translations': [{'text': value.upper()} for key, value in data if key == "text"]
+            }).encode()
+            return mock_response
+        mock_post.side_effect = deepl_response
+        units = [TranslationUnit(f"Test/{counter}", "en", f"Sentence {counter}", f"Sentence {counter}")
+                 for counter in range(60)]
+        self.translator_tool.fortraininglib = Mock()
+        self.translator_tool.fortraininglib.get_translation_units.return_value = TranslatedPage("Test", "en", units)
+        self.translator_tool.fortraininglib.get_translated_title.return_value = None
+
+        self.translator_tool.fetch_and_translate("Test", "fr")
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_page.return_value.save.call_count, 60)
+        uploaded = [call.args[1] for call in mock_page.call_args_list]
+        self.assertEqual(uploaded, [f"Translations:Test/{counter}/fr" for counter in range(60)])
+        self.assertEqual(units[42].get_translation(), "SENTENCE 42")
+
+    @patch('pywikibot.Page')
+    @patch('requests.Session.post')
+    @patch.object(Translator, 'translate')
+    def test_fetch_and_translate_deepl_fails_halfway(self, mock_translate, mock_post, mock_page):
+        # DeepL translates the first batch but refuses the second one: the edit summaries must
+        # still name the service that really translated each unit
+        success = Mock(status_code=200)
+        success.content = json.dumps({'translations': [{'text': f"DeepL {counter}"} for counter in range(50)]})
+        mock_post.side_effect = [success, Mock(status_code=400)]
+        mock_translate.side_effect = lambda text, dest: Mock(text=f"Google {text}")
+        pages = {}
+        mock_page.side_effect = lambda site, title: pages.setdefault(title, Mock())
+        units = [TranslationUnit(f"Test/{counter}", "en", f"Sentence {counter}", f"Sentence {counter}")
+                 for counter in range(60)]
+        self.translator_tool.fortraininglib = Mock()
+        self.translator_tool.fortraininglib.get_translation_units.return_value = TranslatedPage("Test", "en", units)
+        self.translator_tool.fortraininglib.get_translated_title.return_value = None
+
+        with self.assertLogs('pywikitools.autotranslate', level='WARNING'):
+            self.translator_tool.fetch_and_translate("Test", "fr")
+        self.assertEqual(len(pages), 60)
+        for counter in range(60):
+            service = "DeepL" if counter < 50 else "Google Translate"
+            pages[f"Translations:Test/{counter}/fr"].save.assert_called_once_with(
+                summary=f"Automated translation by {service}")
+
+    @patch('pywikibot.Page')
+    @patch('requests.Session.post')
+    def test_fetch_and_translate_upload_errors(self, mock_post, mock_page):
+        def deepl_response(endpoint, data, timeout):
+            mock_response = Mock(status_code=200)
+            mock_response.content = json.dumps({
+                'translations': [{'text': value.upper()} for key, value in data if key == "text"]
+            }).encode()
+            return mock_response
+        mock_post.side_effect = deepl_response
+        self.translator_tool.fortraininglib = Mock()
+        self.translator_tool.fortraininglib.get_translated_title.return_value = None
+        self.translator_tool.fortraininglib.get_translation_units.side_effect = lambda page, language: TranslatedPage(
+            page, language, [TranslationUnit(f"Test/{counter}", "en", f"Sentence {counter}", f"Sentence {counter}")
+                             for counter in range(60)])
+
+        # A transient error: the other translation units are still uploaded
+        mock_page.return_value.save.side_effect = [pywikibot.exceptions.ServerError("503")] + [None] * 59
+        with self.assertLogs('pywikitools.autotranslate', level='WARNING'):
+            with self.assertRaisesRegex(RuntimeError, "1 of 60"):
+                self.translator_tool.fetch_and_translate("Test", "fr")
+        self.assertEqual(mock_page.return_value.save.call_count, 60)
+
+        # Any other error (e.g. missing permissions): stop uploading
+        mock_page.return_value.save.reset_mock()
+        mock_page.return_value.save.side_effect = pywikibot.exceptions.Error("permissiondenied")
+        with self.assertLogs('pywikitools.autotranslate', level='ERROR'):
+            with self.assertRaisesRegex(RuntimeError, "60 of 60"):
+                self.translator_tool.fetch_and_translate("Test", "fr")
+        mock_page.return_value.save.assert_called_once()
+
+    def test_fetch_and_translate_existing_translation(self):
+        self.translator_tool.fortraininglib = Mock()
+        self.translator_tool.fortraininglib.get_translated_title.return_value = "Titre"
+        for _ in range(2):
+            with self.assertLogs('pywikitools.autotranslate', level='WARNING'):
+                self.translator_tool.fetch_and_translate("Test", "fr")
+        # We asked only once and didn't need to load the translation units
+        self.translator_tool.fortraininglib.get_translated_title.assert_called_once_with("Test", "fr")
+        self.translator_tool.fortraininglib.get_translation_units.assert_not_called()
+
     @patch('pywikibot.Page')
     def test_upload_translation(self, mock_page):
-        self.translator_tool.upload_translation("Test_Page/1/fr", "Test translation")
+        self.translator_tool.upload_translation("Test_Page/1/fr", "Test translation", "DeepL")
+        mock_page.assert_called_once_with(self.translator_tool.site, "Translations:Test_Page/1/fr")
+        self.assertEqual(mock_page.return_value.text, "Test translation")
         mock_page.return_value.save.assert_called_once_with(summary="Automated translation by DeepL")
 
 
@@ -1,11 +1,15 @@
 """
 Test cases for CorrectBot: Testing core functionality as well as language-specific rules
 """
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
 from inspect import signature
 import subprocess
+import sys
 import unittest
 import importlib
+import logging
+from logging.handlers import QueueHandler
 from os import listdir
 from os.path import abspath, dirname, isfile, join, normpath
 from typing import Callable, Dict, List, Optional
@@ -368,6 +372,9 @@ class TestRTLCorrector(CorrectorTestCase):
         self.assertEqual(correct(self.corrector, ";التدوين و الكتابة\n:من"), ";التدوين و الكتابة\n:من")
 
     def test_fix_rtl_title(self):
+        self.assertEqual(title_correct(self.corrector, "راهنمای (هفت داستان)"), "راهنمای (هفت داستان)\u200f")
+        self.assertEqual(title_correct(self.corrector, "راهنمای (هفت داستان)\u200f"), "راهنمای (هفت داستان)\u200f")
+        self.assertEqual(title_correct(self.corrector, "(راهنمای) مطالعه"), "(راهنمای) مطالعه")
         self.compare_title_revisions("Bible_Reading_Hints_(Seven_Stories_full_of_Hope)", "fa", 57796, 62364)
 
 
@@ -404,6 +411,28 @@ class TestGermanCorrector(CorrectorTestCase):
             # Now make sure this problematic version gets corrected back to the correct form
             self.assertEqual(correct(self.corrector, needs_correction), valid)
 
+    def test_warnings_of_each_unit(self):
+        unit = TranslationUnit("Test/1", "de", "Test", '"Test')
+        for _ in range(3):
+            self.assertEqual(self.corrector.correct(unit).warnings.count("quotation marks"), 1)
+        handlers = logging.getLogger(PKG_CORRECTORS).handlers
+        self.assertFalse(any(isinstance(handler, QueueHandler) for handler in handlers))
+
+    def test_warnings_in_parallel(self):
+        # Units checked at the same time in different threads must only get their own warnings
+        text = "Das ist ein Satz. " * 20
+        units = [TranslationUnit(f"Test/{counter}", "de", text, f'"{text}' if counter % 2 == 0 else text)
+                 for counter in range(200)]
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)     # Let the threads interleave as much as possible
+        try:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(self.corrector.correct, units))
+        finally:
+            sys.setswitchinterval(switch_interval)
+        for counter, result in enumerate(results):
+            self.assertEqual(result.warnings.count("quotation marks"), 1 if counter % 2 == 0 else 0)
+
     def test_exceptions(self):
         for exception in ["So z.B. auch", "1.Korinther 14,3", "Siehe 1.Mose 40", "Z.B.", "Ggf. möglich"]:
             self.assertEqual(correct(self.corrector, exception), exception)
@@ -544,6 +573,22 @@ class TestPersianCorrector(CorrectorTestCase):
         self.assertEqual(correct(corrector, 'کلمه ”شنیدن“ استفاده'), 'کلمه «شنیدن» استفاده')
 
 
+def prepare_translated_page() -> TranslatedPage:
+    """Prepare a TranslatedPage object out of the FRENCH_CORRECTIONS dictionary"""
+    translation_units: List[TranslationUnit] = []
+    for counter, faulty in enumerate(FRENCH_CORRECTIONS.keys(), start=1):
+        # The structure of original and translation needs to be the same
+        original = "ignored" if "<br/>" not in faulty else "ignored<br/>ignored"
+        translation_units.append(TranslationUnit(f"Test/{counter}", "fr", original, faulty))
+    # Add one translation unit that will produce warnings because of wrong structure
+    translation_units.append(TranslationUnit("Test/warnings1", "fr",
+                             TEST_UNIT_WITH_DEFINITION, TEST_UNIT_WITH_DEFINITION_DE_ERROR))
+    # This unit will produce two warnings in correct_quotes()
+    translation_units.append(TranslationUnit("Test/warnings2", "fr",
+                             'this is a "quote"', 'Ceci est une „citation"'))
+    return TranslatedPage("Test", "fr", translation_units)
+
+
 class TestCorrectBot(unittest.TestCase):
     def setUp(self):
         self.config = ConfigParser()
@@ -601,25 +646,23 @@ class TestCorrectBot(unittest.TestCase):
 
         # Test correction of file name according to title
         unit_title = TranslationUnit("Test/Page_display_title", "fr", "Testing: Now", "Tester: Maintenant")
-        self.correctbot.check_unit(corrector, unit_title)
-        self.assertEqual(self.correctbot._translated_title, "Tester: Maintenant")
+        translated_title = self.correctbot.check_unit(corrector, unit_title).corrections.get_translation()
+        self.assertEqual(translated_title, "Tester: Maintenant")
         unit_filename = TranslationUnit("Test/5", "fr", "Testing_Now.pdf", "Wrong.pdf")
-        result = self.correctbot.check_unit(corrector, unit_filename)
+        result = self.correctbot.check_unit(corrector, unit_filename, translated_title=translated_title)
         self.assertIsNotNone(result)
         self.assertTrue(result.corrections.has_translation_changes())
         self.assertEqual(result.corrections.get_translation(), "Tester_Maintenant.pdf")
         self.assertFalse(unit_filename.has_translation_changes())    # The unit we gave shouldn't be touched
         # A special PDF for printing should receive the translated suffix
         unit_filename_print = TranslationUnit("Test/6", "fr", "Testing_Now_print.pdf", "Pas_correcte.pdf")
-        result = self.correctbot.check_unit(corrector, unit_filename_print)
+        result = self.correctbot.check_unit(corrector, unit_filename_print, translated_title=translated_title)
         self.assertEqual(result.corrections.get_translation(), "Tester_Maintenant_impression.pdf")
         # Internal error: we haven't information on title yet
-        self.correctbot._translated_title = None
         with self.assertLogs("pywikitools.correctbot", level="WARNING"):
             self.assertIsNone(self.correctbot.check_unit(corrector, unit_filename))
         # Title isn't translated
-        self.correctbot._translated_title = ""
-        self.assertIsNone(self.correctbot.check_unit(corrector, unit_filename))
+        self.assertIsNone(self.correctbot.check_unit(corrector, unit_filename, translated_title=""))
 
         # If original and translation is the same: Below a length of 15 characters we assume that's okay
         unit = TranslationUnit("Test/2", "fr", "accident", "accident")
@@ -631,37 +674,24 @@ class TestCorrectBot(unittest.TestCase):
         self.assertFalse(result.suggestions.has_translation_changes())
         self.assertNotEqual(result.warnings, "")
 
-    def prepare_translated_page(self) -> TranslatedPage:
-        """Prepare a TranslatedPage object out of the FRENCH_CORRECTIONS dictionary"""
-        translation_units: List[TranslationUnit] = []
-        for counter, faulty in enumerate(FRENCH_CORRECTIONS.keys(), start=1):
-            # The structure of original and translation needs to be the same
-            original = "ignored" if "<br/>" not in faulty else "ignored<br/>ignored"
-            translation_units.append(TranslationUnit(f"Test/{counter}", "fr", original, faulty))
-        # Add one translation unit that will produce warnings because of wrong structure
-        translation_units.append(TranslationUnit("Test/warnings1", "fr",
-                                 TEST_UNIT_WITH_DEFINITION, TEST_UNIT_WITH_DEFINITION_DE_ERROR))
-        # This unit will produce two warnings in correct_quotes()
-        translation_units.append(TranslationUnit("Test/warnings2", "fr",
-                                 'this is a "quote"', 'Ceci est une „citation"'))
-        return TranslatedPage("Test", "fr", translation_units)
-
     def test_check_page(self):
         # check_page() raises RuntimeError if the page isn't existing
         mock_lib = Mock()
         mock_lib.get_translation_units.return_value = None
         self.correctbot.fortraininglib = mock_lib
         with self.assertRaises(RuntimeError):
-            results = self.correctbot.check_page("NotExisting", "fr")
+            self.correctbot.check_page("NotExisting", "fr")
         mock_lib.get_translation_units.assert_called_once()
 
         # let's correct a page with some French translation units for testing
-        mock_lib.get_translation_units.return_value = self.prepare_translated_page()
+        mock_lib.get_translation_units.return_value = prepare_translated_page()
         with self.assertLogs("pywikitools.correctbot", level="WARNING"):
-            results = self.correctbot.check_page("Test", "fr")
-        self.assertIsNotNone(results)
-        self.assertEqual(len(results), 6)
-        for result in results:
+            report = self.correctbot.check_page("Test", "fr")
+        self.assertEqual(len(report.results), 6)
+        self.assertEqual(report.get_warning_counter(), 4)
+        self.assertGreater(report.get_correction_counter(), 0)
+        self.assertIn("Test/warnings2", report.get_warnings())
+        for result in report.results:
             if "warnings" in result.corrections.get_name():
                 self.assertNotEqual(result.warnings, "")
                 if "Test/warnings2" in result.corrections.get_name():
@@ -679,16 +709,16 @@ class TestCorrectBot(unittest.TestCase):
     def test_save_report(self, mock_page):
         """Check that output of CorrectBot.save_report() is the same as expected in data/correctbot_report.mediawiki
 
-        The test page we use is constructed in self.prepare_translated_page()
+        The test page we use is constructed in prepare_translated_page()
         """
         mock_lib = Mock()
         mock_lib.index_url = "https://www.4training.net/mediawiki/index.php"
-        mock_lib.get_translation_units.return_value = self.prepare_translated_page()
+        mock_lib.get_translation_units.return_value = prepare_translated_page()
         mock_lib.count_jobs.return_value = 0
         self.correctbot.fortraininglib = mock_lib
         with self.assertLogs("pywikitools.correctbot", level="WARNING"):
-            results = self.correctbot.check_page("Test", "fr")
-        self.correctbot.save_report("Test", "fr", results)
+            report = self.correctbot.check_page("Test", "fr")
+        self.correctbot.save_report("Test", "fr", report)
         with open(join(dirname(abspath(__file__)), "data", "correctbot_report.mediawiki"), 'r') as f:
             self.assertEqual(mock_page.return_value.text, f.read())
 
@@ -696,7 +726,7 @@ class TestCorrectBot(unittest.TestCase):
         self.assertNotIn("job queue is not empty", mock_page.return_value.text)
         mock_lib.count_jobs.return_value = 42
         with self.assertLogs("pywikitools.correctbot", level="WARNING"):
-            self.correctbot.save_report("Test", "fr", results)
+            self.correctbot.save_report("Test", "fr", report)
         self.assertIn("job queue is not empty", mock_page.return_value.text)
         mock_lib.count_jobs.return_value = 0
 
@@ -704,10 +734,38 @@ class TestCorrectBot(unittest.TestCase):
         self.assertNotIn("mw-content-rtl", mock_page.return_value.text)
         # check correct formatting for right-to-left languages
         mock_lib.get_language_direction.return_value = "rtl"
-        self.correctbot.save_report("Test", "ar", results)
+        self.correctbot.save_report("Test", "ar", report)
         self.assertIn(r"|direction=rtl}}", mock_page.return_value.text)
         self.assertIn('class="wikitable mw-content-rtl"', mock_page.return_value.text)
 
 
+class TestCorrectBotSaving(unittest.TestCase):
+    """Tests of CorrectBot that don't need a connection to the mediawiki system"""
+    @patch("pywikibot.Site", autospec=True)
+    def setUp(self, mock_pywikibot_site):
+        config = ConfigParser()
+        config.read_dict({"correctbot": {"site": "test", "username": "TestCorrectBot"}})
+        self.correctbot = CorrectBot(config, True)
+
+    @patch("pywikibot.Page")
+    def test_save_to_mediawiki(self, mock_page):
+        mock_lib = Mock()
+        mock_lib.get_translation_units.return_value = prepare_translated_page()
+        self.correctbot.fortraininglib = mock_lib
+        with self.assertLogs("pywikitools.correctbot", level="WARNING"):
+            results = self.correctbot.check_page("Test", "fr").results
+        changed = [result.corrections.get_name() for result in results
+                   if result.corrections.has_translation_changes()]
+        self.assertGreater(len(changed), 0)
+        self.assertTrue(self.correctbot.save_to_mediawiki(results))
+        self.assertEqual(mock_page.return_value.save.call_count, len(changed))
+        self.assertCountEqual([call.args[1] for call in mock_page.call_args_list], changed)
+
+        # Nothing to save
+        mock_page.reset_mock()
+        self.assertFalse(self.correctbot.save_to_mediawiki([]))
+        mock_page.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
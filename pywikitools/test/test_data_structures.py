@@ -10,7 +10,7 @@ from datetime import datetime
 import unittest
 import json
 from os.path import abspath, dirname, join
-from pywikitools.resourcesbot.changes import ChangeItem, ChangeType
+from pywikitools.resourcesbot.changes import ChangeItem, ChangeLog, ChangeType
 from pywikitools.resourcesbot.data_structures import FileInfo, PdfMetadataSummary, TranslationProgress, WorksheetInfo, \
                                                      LanguageInfo, DataStructureEncoder, json_decode
 
@@ -35,6 +35,18 @@ TEST_TITLE: str = "Gottes Reden wahrnehmen"
 TEST_VERSION: str = "1.2"
 
 
+class TestChangeLog(unittest.TestCase):
+    def test_iteration(self):
+        change_log = ChangeLog()
+        change_log.add_change("Prayer", ChangeType.NEW_PDF)
+        change_log.add_change("Forgiving_Step_by_Step", ChangeType.UPDATED_ODT)
+        self.assertEqual(change_log.count_changes(), 2)
+        # Nested loops over the same ChangeLog must not interfere with each other
+        pairs = [(outer.worksheet, inner.worksheet) for outer in change_log for inner in change_log]
+        self.assertEqual(len(pairs), 4)
+        self.assertIn(("Forgiving_Step_by_Step", "Prayer"), pairs)
+
+
 class TestTranslationProgress(unittest.TestCase):
     def test_everything(self):
         is_unfinished = [False, True, False]
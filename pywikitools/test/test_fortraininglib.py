@@ -66,6 +66,12 @@ class TestFortrainingLib(unittest.TestCase):
             self.lib._get({})
         mock_get.assert_called_once()
 
+    def test_retry_when_throttled(self):
+        retry = self.lib.session.get_adapter(self.lib.api_url).max_retries
+        self.assertEqual(retry.total, ForTrainingLib.CONNECT_RETRIES)
+        self.assertIn(429, retry.status_forcelist)
+        self.assertTrue(retry.respect_retry_after_header)
+
     def test_convert_to_filename(self):
         self.assertEqual(ForTrainingLib.convert_to_filename("Hearing from God"), "Hearing_from_God")
         self.assertEqual(ForTrainingLib.convert_to_filename("Nothing_changes"), "Nothing_changes")
@@ -153,6 +159,53 @@ class TestFortrainingLib(unittest.TestCase):
         with self.assertLogs("pywikitools.lib", level="WARNING"):
             self.assertEqual(self.lib.count_jobs(), 0)
 
+    @patch("pywikitools.fortraininglib.ForTrainingLib._get")
+    def test_cached_language_name_and_file_url(self, mock_get):
+        mock_get.return_value = {"parse": {"text": {"*": "<p>German\n</p>"}}}
+        self.assertEqual(self.lib.get_language_name("de", "en"), "German")
+        self.assertEqual(self.lib.get_language_name("de", "en"), "German")
+        mock_get.assert_called_once()
+
+        mock_get.reset_mock()
+        mock_get.return_value = {"query": {"pages": {"42": {"imageinfo": [{"url": "https://example.com/Test.pdf"}]}}}}
+        self.assertEqual(self.lib.get_file_url("Test.pdf"), "https://example.com/Test.pdf")
+        self.assertEqual(self.lib.get_file_url("Test.pdf"), "https://example.com/Test.pdf")
+        mock_get.assert_called_once()
+
+        # Errors don't get cached
+        mock_get.reset_mock()
+        mock_get.return_value = {}
+        self.assertIsNone(self.lib.get_file_url("Missing.pdf"))
+        self.assertIsNone(self.lib.get_file_url("Missing.pdf"))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("pywikitools.fortraininglib.ForTrainingLib._get")
+    def test_get_page_sources(self, mock_get):
+        mock_get.return_value = {"query": {
+            "normalized": [{"from": "Translations:A_B/1/de", "to": "Translations:A B/1/de"}],
+            "pages": {
+                "-1": {"title": "Translations:A B/1/fr", "missing": ""},
+                "42": {"title": "Translations:A B/1/de", "revisions": [{"slots": {"main": {"*": "Hallo"}}}]}}}}
+        self.assertEqual(self.lib.get_page_sources(["Translations:A_B/1/de", "Translations:A B/1/fr"]),
+                         {"Translations:A_B/1/de": "Hallo"})
+        mock_get.assert_called_once()
+        self.assertEqual(mock_get.call_args.args[0]["titles"], "Translations:A_B/1/de|Translations:A B/1/fr")
+
+        # Too many pages for one request
+        mock_get.reset_mock()
+        self.lib.get_page_sources([f"Page {counter}" for counter in range(ForTrainingLib.MAX_TITLES + 1)])
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("pywikitools.fortraininglib.ForTrainingLib.get_page_sources")
+    @patch("pywikitools.fortraininglib.ForTrainingLib.get_page_source")
+    def test_get_pdf_names(self, mock_get_page_source, mock_get_page_sources):
+        mock_get_page_source.return_value = "{{PdfDownload|<translate><!--T:4--> Prayer.pdf</translate>}}"
+        mock_get_page_sources.return_value = {"Translations:Prayer/4/de": "Gebet.pdf"}
+        self.assertEqual(self.lib.get_pdf_names("Prayer", ["en", "de", "fr"]),
+                         {"en": "Prayer.pdf", "de": "Gebet.pdf", "fr": None})
+        mock_get_page_source.assert_called_once_with("Prayer")
+        mock_get_page_sources.assert_called_once_with(["Translations:Prayer/4/de", "Translations:Prayer/4/fr"])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -187,15 +187,15 @@ class TestTranslateODT(unittest.TestCase):
         translateodt = DummyTranslateODT()
 
         # CorrectBot would correct something or give warnings
-        mock_correctbot.return_value.get_correction_counter.return_value = 2
+        mock_correctbot.return_value.check_page.return_value.get_correction_counter.return_value = 2
         with self.assertLogs('pywikitools.translateodt', level='ERROR'):
             self.assertIsNone(translateodt.translate_worksheet("Prayer", "de"))
-        mock_correctbot.return_value.get_correction_counter.return_value = 0
-        mock_correctbot.return_value.get_warning_counter.return_value = 1
+        mock_correctbot.return_value.check_page.return_value.get_correction_counter.return_value = 0
+        mock_correctbot.return_value.check_page.return_value.get_warning_counter.return_value = 1
         with self.assertLogs('pywikitools.translateodt', level='ERROR'):
             self.assertIsNone(translateodt.translate_worksheet("Prayer", "de"))
 
-        mock_correctbot.return_value.get_warning_counter.return_value = 0
+        mock_correctbot.return_value.check_page.return_value.get_warning_counter.return_value = 0
 
         # Can't get translation units of worksheet
         mock_fortraininglib.return_value.get_translation_units.return_value = None
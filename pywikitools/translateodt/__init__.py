@@ -297,8 +297,8 @@ class TranslateODT:
             file name of the created ODT file (or None in case of error)
         """
         self.logger.debug(f"Worksheet: {worksheet}, language code: {language_code}")
-        self.correctbot.check_page(worksheet, language_code)
-        if self.correctbot.get_correction_counter() > 0 or self.correctbot.get_warning_counter() > 0:
+        report = self.correctbot.check_page(worksheet, language_code)
+        if report.get_correction_counter() > 0 or report.get_warning_counter() > 0:
             self.logger.error("Please run CorrectBot first and then try again.")
             return None
         translated_page: Optional[TranslatedPage] = self.fortraininglib.get_translation_units(worksheet, language_code)
@@ -365,7 +365,7 @@ class TranslateODT:
             self._loffice.save_odt(file_path)
         except FileExistsError:
             self.logger.error(f"Couldn't save {file_path}: File exists and is currently opened.")
-        pdf_path = file_path.replace(".odt", ".pdf")
+        pdf_path = os.path.splitext(file_path)[0] + ".pdf"
         self.logger.info(f"Exporting translated document as PDF to {pdf_path}...")
         self._loffice.export_pdf(pdf_path)
 